@@ -1,21 +1,53 @@
 ﻿from pathlib import Path
 from logging import getLogger
 from logging.handlers import RotatingFileHandler
+import hmac
+import json
 import logging
 import os
 from typing import Any
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 
-from feishu import send_post_from_summary_text, _parse_task_line_multi, build_post_zh_cn_from_sections
+from compression import init_compression
+from fastpath import (
+    FastPathMiddleware,
+    cors_headers,
+    load_allowed_origins,
+)
+from feishu import (
+    bind_app,
+    broadcast_post_zh_cn,
+    current_app as current_feishu_app,
+    get_app,
+    resolve_user_names,
+    send_post_parts_async,
+    tenant_token_status,
+    unbind_app,
+    user_name_cache_stats,
+)
 import feishu as _feishu_mod
+from outbound import ENGINE
+from post_updates import NOOP, POST_EDIT_ENABLED, deliver_post_async, post_edit_stats
+from profiling import ProfilingMiddleware
+from recorder import RECORD_ENABLED, RequestRecorder
+from render_cache import MENTIONS, SECTIONS, render_cache_stats, render_summary
 from task_sync_service import (
+    PRIORITIES,
     AnycrossInvokeTimeout,
     AnycrossTriggerError,
+    TaskSyncOverloaded,
+    admit_stream,
+    discard_job,
     enqueue_batch_job,
+    get_job_state,
     get_job_status,
+    iter_job_results,
+    open_batch_job_feed,
     process_single_record,
+    release_stream,
+    scheduler_metrics,
+    worker_pool_status,
 )
 
 def configure_logging() -> None:
@@ -45,49 +77,103 @@ configure_logging()
 app = Flask(__name__)
 getLogger(__name__).info("Using feishu module at: %s", getattr(_feishu_mod, "__file__", "<unknown>"))
 
-# Enable CORS for Vite dev server origins; allow POST and the automatic OPTIONS preflight with Content-Type header
-CORS(app, resources={
-    r"/api/*": {
-        "origins": [
-            "http://localhost:5173",
-            "http://127.0.0.1:5173",
-            "https://paramont.feishu.cn",
-            "https://ext.baseopendev.com",
-        ],
-        "methods": ["POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "X-Requested-With", "Accept"],
-        "max_age": 86400,
-    }
-})
+# Allowed browser origins come from CORS_ALLOWED_ORIGINS (comma separated); see fastpath.py for defaults.
+ALLOWED_ORIGINS = frozenset(load_allowed_origins())
+_CORS_HEADERS = {origin: cors_headers(origin) for origin in ALLOWED_ORIGINS}
+
+# gzip/brotli for large JSON responses (COMPRESS_MIN_SIZE / COMPRESS_LEVEL)
+init_compression(app)
+
+
+@app.before_request
+def _select_feishu_app():
+    """多机器人：X-Feishu-App 请求头或 JSON body 里的 "app" 选择本次请求使用的应用（默认 default）。"""
+    name = request.headers.get("X-Feishu-App")
+    if not name and request.is_json:
+        body = request.get_json(silent=True)
+        name = body.get("app") if isinstance(body, dict) else None
+    if not name:
+        return None
+    if not isinstance(name, str):
+        return jsonify(status="error", message="app must be a string"), 400
+    try:
+        g.feishu_app_token = bind_app(get_app(name.strip()))
+    except ValueError as exc:
+        return jsonify(status="error", message=str(exc)), 400
+    return None
+
+
+@app.teardown_request
+def _release_feishu_app(exc=None):
+    token = g.pop("feishu_app_token", None)
+    if token is not None:
+        unbind_app(token)
 
 
+# Preflights never reach Flask (FastPathMiddleware answers them); this adds the
+# CORS headers to the actual responses for allowed origins.
 @app.after_request
 def _add_cors_headers(resp):
     try:
-        origin = request.headers.get("Origin", "")
-        allowed = {
-            "http://localhost:5173",
-            "http://127.0.0.1:5173",
-            "https://paramont.feishu.cn",
-            "https://ext.baseopendev.com",
-        }
-        if origin in allowed and request.path.startswith("/api/"):
-            resp.headers["Access-Control-Allow-Origin"] = origin
-            resp.headers["Vary"] = "Origin"
-            resp.headers["Access-Control-Allow-Headers"] = "Content-Type, X-Requested-With, Accept"
-            resp.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
-            resp.headers["Access-Control-Max-Age"] = "86400"
+        headers = _CORS_HEADERS.get(request.headers.get("Origin", ""))
+        if headers and request.path.startswith("/api/"):
+            for name, value in headers:
+                if name == "Vary":
+                    resp.vary.add(value)
+                else:
+                    resp.headers[name] = value
     except Exception:
         pass
     return resp
 
 
-@app.route("/api/endpoint", methods=["POST", "OPTIONS"])
-def handle_summary():
-    # Respond to OPTIONS preflight so browsers can make the real request.
-    if request.method == "OPTIONS":
-        return ("", 204)
+def _readiness() -> tuple[bool, dict]:
+    """Health check: Feishu token obtainable and the task-sync worker pool alive."""
+    checks = {"feishuToken": tenant_token_status(), "workerPool": worker_pool_status()}
+    return all(check["ok"] for check in checks.values()), checks
+
+
+# OPTIONS preflights and /healthz are answered before Flask routing.
+# 采样 profiling（默认关闭）；只包住 Flask，预检和 /healthz 不会被采样
+PROFILER = ProfilingMiddleware(app.wsgi_app)
+app.wsgi_app = FastPathMiddleware(PROFILER, allowed_origins=ALLOWED_ORIGINS, readiness=_readiness)
+if RECORD_ENABLED:
+    # 录制 /api/* 请求（脱敏后写入 JSONL），供 replay.py 回放
+    app.wsgi_app = RequestRecorder(app.wsgi_app)
+
+
+def _attach_user_names(*sections: list[dict]) -> None:
+    """Add ``users`` ([{"id", "name"}]) to parsed items using one batched contact lookup."""
+    user_ids = [uid for items in sections for item in items for uid in item["user_ids"]]
+    try:
+        names = resolve_user_names(user_ids)
+    except Exception as exc:
+        # 名称只用于展示，查询失败不影响预览
+        getLogger(__name__).warning("resolve_user_names failed: %s", exc)
+        names = {}
+    for items in sections:
+        for item in items:
+            item["users"] = [{"id": uid, "name": names.get(uid)} for uid in item["user_ids"]]
+
+
+def _render_preview(summary: str, *, with_raw: bool = False) -> tuple[str, list[dict], list[dict], dict]:
+    """Parse a summary the way dry-run/debug do and render its zh_cn; returns (dateLabel, today, week, zh_cn).
+
+    The rendered post comes from the shared render cache; items are copied so
+    callers may annotate them (e.g. ``users``) without touching the cache.
+    """
+    post = render_summary(summary, title="调试", mode=MENTIONS)
+
+    def copy_items(items: list[dict]) -> list[dict]:
+        if with_raw:
+            return [dict(item) for item in items]
+        return [{"user_ids": item["user_ids"], "text": item["text"]} for item in items]
 
+    return post.date_label, copy_items(post.today_items), copy_items(post.week_items), post.zh_cn
+
+
+@app.route("/api/endpoint", methods=["POST"])
+def handle_summary():
     data = request.get_json(silent=True) or {}
     if "summaryText" not in data:
         return jsonify(status="error", message="Missing summaryText"), 400
@@ -99,6 +185,9 @@ def handle_summary():
     pd_flag = data.get("pd") is True
     ops_flag = data.get("ops") is True
     dry_run = data.get("dryRun") is True
+    edit = data.get("edit", True)
+    if not isinstance(edit, bool):
+        return jsonify(status="error", message="edit must be a boolean"), 400
 
     pd_chat = os.getenv("PD_CHAT_ID")
     ops_chat = os.getenv("OPS_CHAT_ID")
@@ -115,23 +204,8 @@ def handle_summary():
 
     # In dryRun mode, parse and return the zh_cn payload without sending to Feishu
     if dry_run:
-        def parse_sections_generic(text: str):
-            # 简化逻辑：凡是以 '@' 开头的行都视为“今日任务”的条目；其余行忽略
-            lines = [ln.rstrip() for ln in (text or "").splitlines() if ln.strip()]
-            date_label = "今日"
-            today_lines = [ln.strip() for ln in lines if ln.lstrip().startswith("@")]
-            return date_label, today_lines, []
-
-        date_label, today_raw, week_raw = parse_sections_generic(summary)
-        today_items = []
-        for ln in today_raw:
-            uids, txt = _parse_task_line_multi(ln)
-            today_items.append({"user_ids": uids, "text": txt})
-        week_items = []
-        for ln in week_raw:
-            uids, txt = _parse_task_line_multi(ln)
-            week_items.append({"user_ids": uids, "text": txt})
-        zh_cn = build_post_zh_cn_from_sections(title="调试", date_label=date_label, today_items=today_items, week_items=week_items)
+        date_label, today_items, week_items, zh_cn = _render_preview(summary)
+        _attach_user_names(today_items, week_items)
         return jsonify(status="ok", dateLabel=date_label, today=today_items, week=week_items, zh_cn=zh_cn)
 
     if not targets:
@@ -139,17 +213,182 @@ def handle_summary():
         return jsonify(status="success", message="Not sent: pd/ops flags are false", targets=[])
 
     try:
-        for chat_id in targets:
-            send_post_from_summary_text(summary, receive_id=chat_id, receive_id_type="chat_id")
-        return jsonify(status="success", message="Sent to targets", targets=targets)
+        post = render_summary(summary, title="任务汇总", mode=SECTIONS)
+        feishu_app = current_feishu_app()
+        if not POST_EDIT_ENABLED:
+            # 超出大小上限时 post.parts 为多条：同一目标按顺序逐条发送，各目标在 outbound 引擎上并发发送
+            futures = [
+                ENGINE.submit(send_post_parts_async(post.parts, receive_id=chat_id, receive_id_type="chat_id", app=feishu_app))
+                for chat_id in targets
+            ]
+            sent = sum(future.result() for future in futures)
+            return jsonify(status="success", message="Sent to targets", targets=targets, parts=len(post.parts), partsSent=sent)
+        # 同一天再次发送时编辑之前的消息（内容没变则不发），见 post_updates.py；各目标在 outbound 引擎上并发发送
+        futures = [
+            ENGINE.submit(deliver_post_async(post, receive_id=chat_id, receive_id_type="chat_id", edit=edit, app=feishu_app))
+            for chat_id in targets
+        ]
+        results = [{"receiveId": chat_id, **future.result()} for chat_id, future in zip(targets, futures)]
+        if all(result["action"] == NOOP for result in results):
+            message = "Not sent: unchanged since the last send"
+        else:
+            message = "Sent to targets"
+        sent = sum(result["partsSent"] for result in results)
+        return jsonify(status="success", message=message, targets=targets, parts=len(post.parts), partsSent=sent, results=results)
     except Exception as exc:
         return jsonify(status="error", message=str(exc)), 500
 
 
-@app.route("/api/task-sync", methods=["POST", "OPTIONS"])
+def _ndjson_line(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+def _ndjson_response(lines) -> Response:
+    resp = Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    # 让 Nginx 逐行转发，不要缓冲整个响应
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+def _wants_stream(data: dict | None = None) -> bool:
+    """``stream: true`` in the JSON body or ``?stream=true`` in the query string."""
+    if data and data.get("stream") is True:
+        return True
+    return request.args.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def _stream_job_results(job_id: str) -> Response:
+    """Stream a job's results; takes over the caller's admit_stream() slot until the response is closed."""
+    resp = _ndjson_response(_ndjson_line(result) for result in iter_job_results(job_id))
+    resp.call_on_close(release_stream)
+    return resp
+
+
+@app.route("/api/broadcast", methods=["POST"])
+def broadcast_summary():
+    """Render a summary once and push it to many chats/users, streaming per-recipient NDJSON results."""
+    data = request.get_json(silent=True) or {}
+    summary = data.get("summaryText")
+    summary = summary.strip() if isinstance(summary, str) else ""
+    if not summary:
+        return jsonify(status="error", message="Missing summaryText"), 400
+
+    chat_ids = data.get("chatIds") or []
+    open_ids = data.get("openIds") or []
+    for name, ids in (("chatIds", chat_ids), ("openIds", open_ids)):
+        if not isinstance(ids, list) or not all(isinstance(x, str) and x.strip() for x in ids):
+            return jsonify(status="error", message=f"{name} must be a list of non-empty strings"), 400
+    # 去重并保持顺序
+    chat_ids = list(dict.fromkeys(x.strip() for x in chat_ids))
+    open_ids = list(dict.fromkeys(x.strip() for x in open_ids))
+    if not chat_ids and not open_ids:
+        return jsonify(status="error", message="chatIds or openIds is required"), 400
+
+    title = data.get("title")
+    if not isinstance(title, str) or not title.strip():
+        title = "任务汇总"
+    edit = data.get("edit", True)
+    if not isinstance(edit, bool):
+        return jsonify(status="error", message="edit must be a boolean"), 400
+    post = render_summary(summary, title=title, mode=SECTIONS)
+
+    deliver = None
+    if POST_EDIT_ENABLED:
+        feishu_app = current_feishu_app()
+
+        async def deliver(receive_id, receive_id_type):
+            return await deliver_post_async(post, receive_id=receive_id, receive_id_type=receive_id_type, edit=edit, app=feishu_app)
+
+    def generate():
+        counts = {"success": 0, "error": 0}
+        actions: dict[str, int] = {}
+        # zh_cn 只在有 openIds 走批量接口时才需要
+        zh_cn = post.zh_cn if open_ids and len(post.parts) == 1 else None
+        for result in broadcast_post_zh_cn(zh_cn, chat_ids=chat_ids, open_ids=open_ids, parts=post.parts, deliver=deliver):
+            counts["success" if result["status"] == "success" else "error"] += 1
+            if "action" in result:
+                actions[result["action"]] = actions.get(result["action"], 0) + 1
+            yield _ndjson_line(result)
+        getLogger(__name__).info(
+            "broadcast finished: total=%d success=%d error=%d parts=%d",
+            len(chat_ids) + len(open_ids),
+            counts["success"],
+            counts["error"],
+            len(post.parts),
+        )
+        summary_line = {"type": "summary", "total": len(chat_ids) + len(open_ids), **counts, "parts": len(post.parts)}
+        if actions:
+            summary_line["actions"] = actions
+        yield _ndjson_line(summary_line)
+
+    return _ndjson_response(generate())
+
+
+def _is_ndjson_request() -> bool:
+    return request.mimetype in ("application/x-ndjson", "application/jsonl")
+
+
+def _iter_ndjson(stream) -> Any:
+    """Yield one decoded value per non-blank line of ``stream``; undecodable lines yield None."""
+    for line_no, raw in enumerate(stream, start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            getLogger(__name__).warning("Skipping invalid NDJSON line %d: %s", line_no, exc)
+            yield None
+
+
+@app.route("/api/dry-run", methods=["POST"])
+def bulk_dry_run():
+    """Render many summaries without sending, streaming one NDJSON line per summary as it is rendered."""
+    # application/x-ndjson：每行一个 summary，边读边渲染，内存不随批量大小增长
+    if _is_ndjson_request():
+        entries = _iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True) or {}
+        entries = data.get("summaries")
+        if not isinstance(entries, list) or not entries:
+            return jsonify(status="error", message="summaries must be a non-empty list"), 400
+
+    def render(index: int, entry: Any) -> dict:
+        entry_id = entry.get("id") if isinstance(entry, dict) else None
+        summary = entry.get("summaryText") if isinstance(entry, dict) else entry
+        summary = summary.strip() if isinstance(summary, str) else ""
+        if not summary:
+            return {"index": index, "id": entry_id, "status": "error", "message": "Missing summaryText"}
+        date_label, today_items, week_items, zh_cn = _render_preview(summary)
+        return {
+            "index": index,
+            "id": entry_id,
+            "status": "ok",
+            "dateLabel": date_label,
+            "today": today_items,
+            "week": week_items,
+            "zh_cn": zh_cn,
+        }
+
+    def generate():
+        for index, entry in enumerate(entries):
+            yield _ndjson_line(render(index, entry))
+
+    return _ndjson_response(generate())
+
+
+def _overloaded(exc: TaskSyncOverloaded, **extra: Any):
+    """429 with a Retry-After estimated from current throughput."""
+    resp = jsonify(status="error", message=str(exc), retryAfter=exc.retry_after, **extra)
+    resp.status_code = 429
+    resp.headers["Retry-After"] = str(exc.retry_after)
+    return resp
+
+
+@app.route("/api/task-sync", methods=["POST"])
 def trigger_task_sync():
-    if request.method == "OPTIONS":
-        return ("", 204)
+    if _is_ndjson_request():
+        return _trigger_task_sync_ndjson()
 
     data = request.get_json(silent=True) or {}
     webhook_url = data.get("webhookUrl")
@@ -164,6 +403,9 @@ def trigger_task_sync():
         return jsonify(status="error", message="payload must be an object"), 400
 
     timeout_value = data.get("timeout", 70)
+    priority = data.get("priority")
+    if priority is not None and priority not in PRIORITIES:
+        return jsonify(status="error", message=f"priority must be one of {', '.join(PRIORITIES)}"), 400
 
     # Handle a single record call.
     if records is None:
@@ -174,46 +416,192 @@ def trigger_task_sync():
         else:
             entry = {"recordId": record_id, "payload": payload}
 
-        result = process_single_record(
-            webhook_url,
-            entry,
-            timeout=timeout_value,
-        )
+        try:
+            result = process_single_record(
+                webhook_url,
+                entry,
+                timeout=timeout_value,
+                priority=priority or "interactive",
+            )
+        except TaskSyncOverloaded as exc:
+            return _overloaded(exc)
         status = result.get("status")
         if status == "success":
             return jsonify(result)
         if status == "accepted":
             return jsonify(result), 202
+        if "errors" in result:
+            # rejected by payload validation; nothing was sent upstream
+            return jsonify(result), 400
         return jsonify(result), 502
 
     # Batch process multiple records.
     if not isinstance(records, list) or not records:
         return jsonify(status="error", message="records must be a non-empty list"), 400
 
-    job_id = enqueue_batch_job(
-        webhook_url,
-        records,
-        timeout=timeout_value,
-    )
+    stream = _wants_stream(data)
+    try:
+        if stream:
+            # 流式结果会一直占用一个服务线程，和单条调用一样需要限流
+            admit_stream()
+        try:
+            job_id = enqueue_batch_job(
+                webhook_url,
+                records,
+                timeout=timeout_value,
+                priority=priority,
+            )
+        except BaseException:
+            if stream:
+                release_stream()
+            raise
+    except TaskSyncOverloaded as exc:
+        return _overloaded(exc)
+    if stream:
+        return _stream_job_results(job_id)
     return jsonify(status="accepted", jobId=job_id), 202
 
 
+def _trigger_task_sync_ndjson():
+    """Batch sync from an NDJSON body (one record per line); records are validated and buffered as they are read.
+
+    webhookUrl / timeout / priority come from the query string since the body is the record stream.
+    """
+    webhook_url = request.args.get("webhookUrl")
+    if not isinstance(webhook_url, str) or not webhook_url.strip():
+        return jsonify(status="error", message="webhookUrl is required"), 400
+    timeout_value = request.args.get("timeout", default=70, type=int)
+    priority = request.args.get("priority", "bulk")
+    if priority not in PRIORITIES:
+        return jsonify(status="error", message=f"priority must be one of {', '.join(PRIORITIES)}"), 400
+
+    # 读取上传的 body（以及 stream=true 时的结果流）期间占用一个服务线程
+    try:
+        admit_stream()
+    except TaskSyncOverloaded as exc:
+        return _overloaded(exc)
+    handed_off = False
+    feed = None
+    try:
+        try:
+            for entry in _iter_ndjson(request.stream):
+                if feed is None:
+                    # 读到第一条记录才建任务，空 body 直接返回 400
+                    try:
+                        feed = open_batch_job_feed(webhook_url, timeout=timeout_value, priority=priority)
+                    except TaskSyncOverloaded as exc:
+                        return _overloaded(exc)
+                try:
+                    if not feed.put(entry):
+                        break
+                except TaskSyncOverloaded as exc:
+                    # 排队记录数已满：已收下的记录照常处理，其余记录让客户端稍后重传
+                    return _overloaded(exc, jobId=feed.job_id, records=feed.count)
+        finally:
+            if feed is not None:
+                feed.close()
+
+        if feed is None:
+            return jsonify(status="error", message="records must be a non-empty list"), 400
+        if _wants_stream():
+            handed_off = True
+            return _stream_job_results(feed.job_id)
+        return jsonify(status="accepted", jobId=feed.job_id, records=feed.count), 202
+    finally:
+        if not handed_off:
+            release_stream()
+
+
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    # 渲染缓存、用户名缓存与消息编辑登记的命中率 / 占用；outbound 引擎的在途请求数
+    resp = jsonify(
+        status="ok",
+        renderCache=render_cache_stats(),
+        userNameCache=user_name_cache_stats(),
+        postEdits=post_edit_stats(),
+        outbound=ENGINE.metrics(),
+    )
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@app.route("/api/task-sync/metrics", methods=["GET"])
+def get_task_sync_metrics():
+    # 各优先级队列的排队数、运行数和排队等待时间
+    resp = jsonify(status="ok", **scheduler_metrics())
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+# Admin endpoints require ADMIN_TOKEN to be set and sent as X-Admin-Token.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def _admin_denied():
+    if not ADMIN_TOKEN:
+        return jsonify(status="error", message="admin endpoints are disabled (ADMIN_TOKEN not set)"), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify(status="error", message="invalid admin token"), 401
+    return None
+
+
+@app.route("/api/admin/profiling", methods=["GET", "POST"])
+def admin_profiling():
+    denied = _admin_denied()
+    if denied is not None:
+        return denied
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        enabled = data.get("enabled")
+        sample_rate = data.get("sampleRate")
+        routes = data.get("routes")
+        if enabled is not None and not isinstance(enabled, bool):
+            return jsonify(status="error", message="enabled must be a boolean"), 400
+        if sample_rate is not None and (not isinstance(sample_rate, int) or isinstance(sample_rate, bool)):
+            return jsonify(status="error", message="sampleRate must be an integer"), 400
+        if routes is not None and not isinstance(routes, str):
+            return jsonify(status="error", message="routes must be a string (regex)"), 400
+        try:
+            PROFILER.configure(enabled=enabled, sample_rate=sample_rate, routes=routes)
+        except ValueError as exc:
+            return jsonify(status="error", message=str(exc)), 400
+    resp = jsonify(status="ok", **PROFILER.status())
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
 @app.route("/api/task-sync/status/<job_id>", methods=["GET"])
 def get_task_sync_job(job_id: str):
-    job = get_job_status(job_id, pop=False)
+    # ?view=summary：只返回状态、计数和时间戳，不带 results
+    summary_only = request.args.get("view") == "summary"
+    state = get_job_state(job_id)
+    if state is None:
+        return jsonify(status="error", message="job not found"), 404
+    version, status = state
+    final = status in {"success", "error", "partial", "accepted"}
+
+    # ETag 随任务版本变化；未变化时直接 304，不再序列化 results
+    etag_suffix = "-s" if summary_only else ""
+    etag = f"{job_id}-{version}{etag_suffix}"
+    if request.if_none_match.contains_weak(etag):
+        if final and not summary_only:
+            discard_job(job_id)
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    job = get_job_status(job_id, summary_only=summary_only)
     if not job:
         return jsonify(status="error", message="job not found"), 404
-    response = {"status": job.get("status"), "results": job.get("results", [])}
-    if "createdAt" in job:
-        response["createdAt"] = job["createdAt"]
-    if "updatedAt" in job:
-        response["updatedAt"] = job["updatedAt"]
-    if "completedAt" in job:
-        response["completedAt"] = job["completedAt"]
-    if job.get("status") in {"success", "error", "partial", "accepted"}:
-        # remove completed job from cache on final states
-        get_job_status(job_id, pop=True)
-    return jsonify(response)
+    if final and not summary_only:
+        # remove completed job from cache once its full results were delivered
+        discard_job(job_id)
+    resp = jsonify(job)
+    resp.set_etag(f"{job_id}-{job['version']}{etag_suffix}")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 
 @app.route("/api/debug/parse", methods=["POST"])
@@ -223,29 +611,8 @@ def debug_parse():
     if not summary_text:
         return jsonify(status="error", message="Missing summaryText"), 400
 
-    def parse_sections_generic(text: str):
-        # 简化：仅收集以 '@' 开头的行
-        lines = [ln.rstrip() for ln in (text or "").splitlines() if ln.strip()]
-        date_label = "今日"
-        today_lines = [ln.strip() for ln in lines if ln.lstrip().startswith("@")]
-        return date_label, today_lines, []
-
-    date_label, today_raw, week_raw = parse_sections_generic(summary_text)
-    today_items = []
-    for ln in today_raw:
-        uids, txt = _parse_task_line_multi(ln)
-        today_items.append({"user_ids": uids, "text": txt, "raw": ln})
-    week_items = []
-    for ln in week_raw:
-        uids, txt = _parse_task_line_multi(ln)
-        week_items.append({"user_ids": uids, "text": txt, "raw": ln})
-
-    zh_cn = build_post_zh_cn_from_sections(
-        title="调试",
-        date_label=date_label,
-        today_items=[{"user_ids": it["user_ids"], "text": it["text"]} for it in today_items],
-        week_items=[{"user_ids": it["user_ids"], "text": it["text"]} for it in week_items],
-    )
+    date_label, today_items, week_items, zh_cn = _render_preview(summary_text, with_raw=True)
+    _attach_user_names(today_items, week_items)
     return jsonify(status="ok", dateLabel=date_label, today=today_items, week=week_items, zh_cn=zh_cn)
 
 
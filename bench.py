@@ -0,0 +1,302 @@
+"""Micro-benchmarks for the bot's hot paths.
+
+Usage (inside project root, venv activated):
+    python bench.py jobs [--jobs 10000] [--records 100]
+    python bench.py compression [--records 500] [--lines 300]
+    python bench.py render [--lines 300] [--repeat 200]
+
+Each benchmark prints a short plain-text report; nothing talks to Feishu or
+Anycross.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import compression
+import feishu
+import task_sync_service as tss
+from feishu import _parse_task_line_multi, build_post_zh_cn_from_sections
+
+
+def anycross_body(record_id: str, r: int) -> str:
+    """A typical Anycross webhook reply; it echoes the record, so every record's body differs."""
+    return json.dumps({"code": 0, "msg": "success", "data": {"record_id": record_id, "task_guid": f"{r:08x}-5b1c-4c2e-9d7a-3f6e1a2b4c5d"}})
+
+
+# ---- Benchmark corpus ------------------------------------------------------
+
+_PROJECTS = ("插件-Apple/MS Task抓取", "多维表格同步", "飞书机器人", "周报自动化", "Anycross 集成流")
+_TASKS = ("阅读swift extension的document.", "建立swift的开发环境", "先建立函数和多维表格的API打通", "整理字段映射", "联调任务状态回写")
+_STATES = ("未完成", "进行中", "已完成", "阻塞")
+
+
+def corpus_summary(lines: int) -> str:
+    """A generated summary shaped like the plugin's weekly output."""
+    out = ["今日任务:"]
+    for i in range(lines):
+        if i == lines // 2:
+            out.append("本周任务:")
+        users = " ".join(f"@ou_{(i * 7 + k) % 40:032x}" for k in range(1 + i % 3))
+        out.append(
+            f"(第{i + 1}条) {users}, {_PROJECTS[i % len(_PROJECTS)]}, "
+            f"{_TASKS[i % len(_TASKS)]} #{i}, {_STATES[i % len(_STATES)]}"
+        )
+    return "\n".join(out)
+
+
+def corpus_status_payload(records: int) -> bytes:
+    """Full /api/task-sync/status body for a finished job with Anycross replies."""
+    job = tss.BatchJob("0" * 32)
+    for r in range(records):
+        result = tss.RecordResult(
+            f"recuXOHIjy{r:05d}",
+            tss._SUCCESS,
+            http=200,
+            body=json.loads(anycross_body(f"recuXOHIjy{r:05d}", r)),
+        )
+        result.index = r
+        job.add_result(result)
+    job.finish()
+    # Flask's jsonify defaults: ASCII-escaped, compact separators
+    return json.dumps(job.to_dict(), separators=(",", ":")).encode()
+
+
+def corpus_dry_run_payload(lines: int) -> bytes:
+    """/api/endpoint dryRun body (dateLabel, today/week items, zh_cn) for a long summary."""
+    today, week, current = [], [], None
+    for ln in corpus_summary(lines).splitlines():
+        if ln.endswith("任务:"):
+            current = week if ln.startswith("本周") else today
+            continue
+        uids, txt = _parse_task_line_multi(ln)
+        current.append({"user_ids": uids, "text": txt})
+    zh_cn = build_post_zh_cn_from_sections(title="调试", date_label="今日", today_items=today, week_items=week)
+    body = {"status": "ok", "dateLabel": "今日", "today": today, "week": week, "zh_cn": zh_cn}
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def _measure(build: Callable[[], Any]) -> tuple[Any, int, float]:
+    """Return (result, bytes allocated and still held, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def _legacy_jobs(jobs: int, records: int) -> Dict[str, Dict[str, Any]]:
+    """The pre-slots layout: a dict per job holding a list of result dicts."""
+    store: Dict[str, Dict[str, Any]] = {}
+    now = time.time()
+    for j in range(jobs):
+        results: List[Dict[str, Any]] = []
+        for r in range(records):
+            record_id = f"rec{j:06d}{r:04d}"
+            results.append(
+                {
+                    "recordId": record_id,
+                    "status": "success",
+                    "http": 200,
+                    "body": json.loads(anycross_body(record_id, r)),
+                }
+            )
+        store[f"{j:032x}"] = {
+            "status": "success",
+            "results": results,
+            "createdAt": now,
+            "updatedAt": now,
+            "completedAt": now,
+        }
+    return store
+
+
+def _slotted_jobs(jobs: int, records: int) -> Dict[str, tss.BatchJob]:
+    store: Dict[str, tss.BatchJob] = {}
+    for j in range(jobs):
+        job = tss.BatchJob(f"{j:032x}")
+        for r in range(records):
+            record_id = f"rec{j:06d}{r:04d}"
+            result = tss.RecordResult(record_id, tss._SUCCESS, http=200, body=json.loads(anycross_body(record_id, r)))
+            result.index = r
+            job.add_result(result)
+        job.finish()
+        store[job.job_id] = job
+    return store
+
+
+def _legacy_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    counts = {"success": 0, "accepted": 0, "error": 0}
+    for result in job["results"]:
+        status = result.get("status")
+        counts[status if status in counts else "error"] += 1
+    return {"status": job["status"], "total": len(job["results"]), **counts}
+
+
+def bench_jobs(args: argparse.Namespace) -> None:
+    jobs, records = args.jobs, args.records
+    print(f"jobs={jobs} records/job={records} ({jobs * records:,} results)")
+
+    legacy, legacy_bytes, legacy_s = _measure(lambda: _legacy_jobs(jobs, records))
+    job = next(iter(legacy.values()))
+    started = time.perf_counter()
+    for _ in range(1000):
+        _legacy_summary(job)
+    legacy_summary_us = (time.perf_counter() - started) * 1000
+    del legacy, job
+
+    slotted, slotted_bytes, slotted_s = _measure(lambda: _slotted_jobs(jobs, records))
+    job = next(iter(slotted.values()))
+    started = time.perf_counter()
+    for _ in range(1000):
+        job.summary()
+    slotted_summary_us = (time.perf_counter() - started) * 1000
+    del slotted, job
+
+    print(f"{'layout':<10}{'memory MiB':>12}{'bytes/result':>14}{'build s':>10}{'summary us':>12}")
+    for name, held, built, summary_us in (
+        ("dicts", legacy_bytes, legacy_s, legacy_summary_us),
+        ("slots", slotted_bytes, slotted_s, slotted_summary_us),
+    ):
+        print(
+            f"{name:<10}{held / 2**20:>12.1f}{held / (jobs * records):>14.0f}"
+            f"{built:>10.2f}{summary_us:>12.2f}"
+        )
+    print(f"memory saved: {1 - slotted_bytes / legacy_bytes:.0%}")
+
+
+def bench_compression(args: argparse.Namespace) -> None:
+    payloads = {
+        f"status ({args.records} records)": corpus_status_payload(args.records),
+        f"dry-run ({args.lines} lines)": corpus_dry_run_payload(args.lines),
+    }
+    settings = [("gzip", level) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 9)]
+    else:
+        print("(brotli not installed; gzip only)")
+
+    print(f"{'payload':<24}{'codec':<8}{'bytes':>10}{'ratio':>8}{'ms':>8}")
+    for name, data in payloads.items():
+        print(f"{name:<24}{'none':<8}{len(data):>10}{1:>8.2f}{0:>8.2f}")
+        for codec, level in settings:
+            if codec == "br":
+                fn = lambda: compression.brotli.compress(data, quality=level)  # noqa: E731
+            else:
+                fn = lambda: compression.gzip.compress(data, compresslevel=level, mtime=0)  # noqa: E731
+            out = fn()
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                fn()
+            ms = (time.perf_counter() - started) * 1000 / args.repeat
+            print(f"{'':<24}{f'{codec}-{level}':<8}{len(out):>10}{len(out) / len(data):>8.2f}{ms:>8.2f}")
+
+
+def _legacy_shrink(text: str) -> str:
+    """The pre-cache shrink: re-imports re and re-splits on every call."""
+    if not isinstance(text, str):
+        return text
+    import re as _re
+    parts = [p.strip() for p in _re.split(r"[\s,\uFF0C\u3001;\uFF1B·\u2014\-]+", text) if p.strip()]
+    if len(parts) >= 2:
+        return ", ".join(parts[-2:])
+    return text.strip()
+
+
+def _legacy_task_line(user_ids: List[str], text: str) -> List[dict]:
+    line: List[dict] = [{"tag": "text", "text": "☐   ", "style": ["italic"]}]
+    cleaned_ids = [uid for uid in (user_ids or []) if isinstance(uid, str) and uid.strip()]
+    for idx, uid in enumerate(cleaned_ids):
+        line.append({"tag": "at", "user_id": uid})
+        if idx < len(cleaned_ids) - 1:
+            line.append({"tag": "text", "text": " ", "style": ["italic"]})
+    if text:
+        text = _legacy_shrink(text)  # second shrink of the same text
+        prefix = " " if cleaned_ids else ""
+        line.append({"tag": "text", "text": f"{prefix}{text}", "style": ["italic", "bold"]})
+    return line
+
+
+def _legacy_render(title: str, date_label: str, today: List[dict], week: List[dict]) -> str:
+    """The pre-refactor send path: shrink twice, fresh style lists, full dict, then json.dumps."""
+    blocks: List[List[dict]] = [[{"tag": "text", "text": f"{date_label}任务:", "style": ["bold"]}]]
+    for items, header in ((today, None), (week, "本周任务:")):
+        if header and items:
+            blocks.append([{"tag": "text", "text": header, "style": ["bold"]}])
+        for item in items:
+            blocks.append(_legacy_task_line(list(item.get("user_ids") or []), _legacy_shrink(item.get("text", ""))))
+    return json.dumps({"zh_cn": {"title": title, "content": blocks}}, ensure_ascii=False)
+
+
+def bench_render(args: argparse.Namespace) -> None:
+    date_label, today, week = feishu._parse_summary_sections(corpus_summary(args.lines))
+    legacy = _legacy_render("任务汇总", date_label, today, week)
+    current = feishu.render_post_content(title="任务汇总", date_label=date_label, today_items=today, week_items=week)
+    assert legacy == current, "renderers disagree"
+    print(f"lines={args.lines} content={len(current.encode())} bytes repeat={args.repeat}")
+
+    def cold() -> str:
+        feishu._shrink_cached.cache_clear()
+        return feishu.render_post_content(title="任务汇总", date_label=date_label, today_items=today, week_items=week)
+
+    variants = [
+        ("legacy: dict + json.dumps", lambda: _legacy_render("任务汇总", date_label, today, week)),
+        (
+            "dict + json.dumps",
+            lambda: json.dumps(
+                {"zh_cn": build_post_zh_cn_from_sections(title="任务汇总", date_label=date_label, today_items=today, week_items=week)},
+                ensure_ascii=False,
+            ),
+        ),
+        ("direct content, cold", cold),
+        (
+            "direct content, warm",
+            lambda: feishu.render_post_content(title="任务汇总", date_label=date_label, today_items=today, week_items=week),
+        ),
+    ]
+    baseline = None
+    print(f"{'renderer':<30}{'ms':>10}{'speedup':>10}")
+    for name, fn in variants:
+        fn()
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        ms = (time.perf_counter() - started) * 1000 / args.repeat
+        baseline = baseline or ms
+        print(f"{name:<30}{ms:>10.3f}{baseline / ms:>9.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    jobs = sub.add_parser("jobs", help="memory of the batch job store and cost of a status summary")
+    jobs.add_argument("--jobs", type=int, default=10_000)
+    jobs.add_argument("--records", type=int, default=100)
+    jobs.set_defaults(func=bench_jobs)
+
+    comp = sub.add_parser("compression", help="gzip/brotli size and CPU on status and dry-run payloads")
+    comp.add_argument("--records", type=int, default=500)
+    comp.add_argument("--lines", type=int, default=300)
+    comp.add_argument("--repeat", type=int, default=20)
+    comp.set_defaults(func=bench_compression)
+
+    render = sub.add_parser("render", help="post rendering: legacy dict + json.dumps vs direct content string")
+    render.add_argument("--lines", type=int, default=300)
+    render.add_argument("--repeat", type=int, default=200)
+    render.set_defaults(func=bench_render)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Send many summaries or task-sync records from a JSONL file (or stdin).
+
+Usage (inside project root, venv activated):
+    python bulk_send.py summaries summaries.jsonl --chat-id oc_xxx --concurrency 8 --rate 5 --out logs/bulk.jsonl
+    cat records.jsonl | python bulk_send.py task-sync - --webhook-url https://.../anycross/trigger/callback/xxx
+
+``summaries`` lines are ``{"summaryText": "...", "chatIds": [...], "openIds": [...],
+"title": "...", "id": "row-1", "app": "bot-a"}`` (or a bare summary string, sent
+to ``--chat-id``/``--open-id``). ``task-sync`` lines are record entries as
+accepted by ``/api/task-sync`` (``"recXXX"`` or ``{"recordId": ..., "payload": {...}}``),
+optionally with their own ``"webhookUrl"``. Lines go through the same
+library functions as the HTTP API (render cache, size-aware splitting,
+edit in place, the task-sync scheduler).
+
+At most ``--concurrency`` lines are in flight and at most ``--rate`` lines
+start per second (0 = unlimited). One JSON result per input line is written
+to ``--out`` (stdout by default) as it completes; throughput and latency
+stats go to stderr at the end. Point ``FEISHU_API_BASE`` at
+``stub_upstream.py`` to try it without touching Feishu.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterator, List, Tuple
+
+import feishu
+from feishu import broadcast_post_zh_cn
+from latency_stats import percentile
+from post_updates import POST_EDIT_ENABLED, deliver_post_async
+from render_cache import SECTIONS, render_summary
+from task_sync_service import BULK, TaskSyncOverloaded, process_single_record
+
+
+class RateLimiter:
+    """Spread starts evenly: at most ``rate`` per second across all threads (0 = unlimited)."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_lines(stream: IO[str]) -> Iterator[Tuple[int, Any]]:
+    """Yield (line number, decoded value) for non-blank lines; undecodable lines yield a ValueError."""
+    for line_no, raw in enumerate(stream, start=1):
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as exc:
+            yield line_no, exc
+
+
+def _id_list(value: Any, name: str) -> List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(x, str) and x.strip() for x in value):
+        raise ValueError(f"{name} must be a list of non-empty strings")
+    return list(dict.fromkeys(x.strip() for x in value))
+
+
+def send_summary(entry: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    if isinstance(entry, str):
+        entry = {"summaryText": entry}
+    if not isinstance(entry, dict):
+        raise ValueError("line must be a summary string or an object")
+    summary = entry.get("summaryText")
+    summary = summary.strip() if isinstance(summary, str) else ""
+    if not summary:
+        raise ValueError("Missing summaryText")
+    chat_ids = _id_list(entry.get("chatIds"), "chatIds") or args.chat_id
+    open_ids = _id_list(entry.get("openIds"), "openIds") or args.open_id
+    if not chat_ids and not open_ids:
+        raise ValueError("chatIds or openIds is required (or pass --chat-id / --open-id)")
+    title = entry.get("title") if isinstance(entry.get("title"), str) and entry["title"].strip() else args.title
+
+    with feishu.use_app(entry.get("app") or args.app) as app:
+        post = render_summary(summary, title=title, mode=SECTIONS)
+        deliver = None
+        if POST_EDIT_ENABLED:
+            async def deliver(receive_id, receive_id_type):
+                return await deliver_post_async(post, receive_id=receive_id, receive_id_type=receive_id_type, edit=args.edit, app=app)
+        zh_cn = post.zh_cn if open_ids and len(post.parts) == 1 else None
+        results = list(broadcast_post_zh_cn(
+            zh_cn,
+            chat_ids=chat_ids,
+            open_ids=open_ids,
+            concurrency=args.recipient_concurrency,
+            parts=post.parts,
+            deliver=deliver,
+        ))
+    ok = sum(1 for r in results if r["status"] == "success")
+    status = "success" if ok == len(results) else "error" if not ok else "partial"
+    return {"status": status, "parts": len(post.parts), "results": results}
+
+
+def sync_record(entry: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    webhook_url = args.webhook_url
+    if isinstance(entry, dict) and entry.get("webhookUrl"):
+        webhook_url = entry["webhookUrl"]
+        entry = {k: v for k, v in entry.items() if k != "webhookUrl"}
+    if not isinstance(webhook_url, str) or not webhook_url.strip():
+        raise ValueError("webhookUrl is required (or pass --webhook-url)")
+    attempt = 0
+    while True:
+        try:
+            return process_single_record(webhook_url.strip(), entry, timeout=args.timeout, priority=BULK)
+        except TaskSyncOverloaded as exc:
+            # in-process admission limit (TASK_SYNC_MAX_INFLIGHT_SINGLES); back off and retry
+            attempt += 1
+            if attempt > args.retries:
+                raise
+            time.sleep(min(exc.retry_after, 5))
+
+
+HANDLERS: Dict[str, Callable[[Any, argparse.Namespace], Dict[str, Any]]] = {
+    "summaries": send_summary,
+    "task-sync": sync_record,
+}
+
+
+def _run_one(handler: Callable, line_no: int, entry: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    started = time.perf_counter()
+    out: Dict[str, Any] = {"line": line_no}
+    if isinstance(entry, dict) and entry.get("id") is not None:
+        out["id"] = entry["id"]
+    try:
+        if isinstance(entry, ValueError):
+            raise ValueError(f"invalid JSON: {entry}")
+        out.update(handler(entry, args))
+    except Exception as exc:  # noqa: BLE001
+        out.update(status="error", message=str(exc))
+    out["latencyMs"] = round((time.perf_counter() - started) * 1000, 2)
+    return out
+
+
+def run(args: argparse.Namespace, source: IO[str], sink: IO[str]) -> Dict[str, Any]:
+    handler = HANDLERS[args.command]
+    limiter = RateLimiter(args.rate)
+    slots = threading.BoundedSemaphore(max(1, args.concurrency))
+    write_lock = threading.Lock()
+    latencies: List[float] = []
+    counts: Dict[str, int] = {}
+
+    def done(result: Dict[str, Any]) -> None:
+        with write_lock:
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sink.flush()
+            latencies.append(result["latencyMs"])
+            counts[result.get("status", "error")] = counts.get(result.get("status", "error"), 0) + 1
+
+    def task(line_no: int, entry: Any) -> None:
+        try:
+            done(_run_one(handler, line_no, entry, args))
+        finally:
+            slots.release()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        # the input is read lazily: only `concurrency` lines are held at a time
+        for line_no, entry in read_lines(source):
+            slots.acquire()
+            limiter.wait()
+            pool.submit(task, line_no, entry)
+    elapsed = time.monotonic() - started
+    return {
+        "total": len(latencies),
+        **counts,
+        "elapsedSec": round(elapsed, 3),
+        "perSec": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50Ms": percentile(latencies, 0.50),
+        "p95Ms": percentile(latencies, 0.95),
+        "p99Ms": percentile(latencies, 0.99),
+        "maxMs": max(latencies) if latencies else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin (default)")
+    common.add_argument("--out", help="write per-line results (JSONL) here instead of stdout")
+    common.add_argument("--concurrency", type=int, default=8, help="lines in flight at once")
+    common.add_argument("--rate", type=float, default=0, help="max lines started per second; 0 = unlimited")
+
+    summaries = sub.add_parser("summaries", parents=[common], help="render and send summaries")
+    summaries.add_argument("--chat-id", action="append", default=[], help="default chat for lines without chatIds/openIds (repeatable)")
+    summaries.add_argument("--open-id", action="append", default=[], help="default user for lines without chatIds/openIds (repeatable)")
+    summaries.add_argument("--title", default="任务汇总")
+    summaries.add_argument("--app", help="bot app from FEISHU_APPS (default: APP_ID/APP_SECRET); a line's \"app\" wins")
+    summaries.add_argument("--no-edit", dest="edit", action="store_false", help="always send new posts instead of editing today's")
+    summaries.add_argument("--recipient-concurrency", type=int, default=None, help="parallel sends per line (BROADCAST_CONCURRENCY)")
+
+    task_sync = sub.add_parser("task-sync", parents=[common], help="push records to an Anycross webhook")
+    task_sync.add_argument("--webhook-url", help="default webhook for lines without webhookUrl")
+    task_sync.add_argument("--timeout", type=int, default=70)
+    task_sync.add_argument("--retries", type=int, default=3, help="retries when the in-process admission limit is hit")
+
+    args = parser.parse_args()
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        stats = run(args, source, sink)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(json.dumps({"type": "stats", **stats}, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
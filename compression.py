@@ -0,0 +1,86 @@
+"""Negotiated gzip / brotli compression for large Flask responses."""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+
+from flask import Flask, Response, request
+
+try:  # optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this many bytes are sent as-is.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# gzip level 1-9 and brotli quality 0-11.
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = frozenset({"application/json", "application/x-ndjson", "text/plain", "text/html"})
+
+
+def _choose_encoding() -> str | None:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def compress_response(resp: Response) -> Response:
+    """Compress ``resp`` in place when the client accepts it and it is worth it."""
+    if (
+        resp.direct_passthrough
+        or resp.is_streamed  # NDJSON streams go out line by line
+        or resp.status_code < 200
+        or resp.status_code in (204, 304)
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in _COMPRESSIBLE_TYPES
+    ):
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    length = resp.content_length
+    if length is not None and length < COMPRESS_MIN_SIZE:
+        return resp
+    encoding = _choose_encoding()
+    if encoding is None:
+        return resp
+
+    data = resp.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return resp
+    compressed = compress_body(data, encoding)
+    if len(compressed) >= len(data):
+        return resp
+
+    resp.set_data(compressed)
+    resp.headers["Content-Encoding"] = encoding
+    # 压缩后的表示与原始表示不同，强 ETag 需降级为弱 ETag
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def init_compression(app: Flask) -> None:
+    app.after_request(compress_response)
+    logger.info(
+        "Response compression enabled: min_size=%d gzip_level=%d brotli=%s",
+        COMPRESS_MIN_SIZE,
+        COMPRESS_LEVEL,
+        "on" if brotli is not None else "off",
+    )
@@ -0,0 +1,96 @@
+"""WSGI middleware answering CORS preflights and health checks before Flask."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALLOWED_ORIGINS = (
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+    "https://paramont.feishu.cn",
+    "https://ext.baseopendev.com",
+)
+CORS_ALLOW_METHODS = ("POST", "OPTIONS")
+CORS_ALLOW_HEADERS = ("Content-Type", "X-Requested-With", "Accept", "X-Feishu-App")
+CORS_MAX_AGE = 86400
+
+Readiness = Callable[[], Tuple[bool, Dict[str, Any]]]
+
+
+def load_allowed_origins() -> Tuple[str, ...]:
+    """Origins from ``CORS_ALLOWED_ORIGINS`` (comma separated), else the defaults."""
+    raw = os.getenv("CORS_ALLOWED_ORIGINS", "")
+    origins = tuple(o.strip().rstrip("/") for o in raw.split(",") if o.strip())
+    return origins or DEFAULT_ALLOWED_ORIGINS
+
+
+def cors_headers(origin: str) -> List[Tuple[str, str]]:
+    return [
+        ("Access-Control-Allow-Origin", origin),
+        ("Vary", "Origin"),
+        ("Access-Control-Allow-Headers", ", ".join(CORS_ALLOW_HEADERS)),
+        ("Access-Control-Allow-Methods", ", ".join(CORS_ALLOW_METHODS)),
+        ("Access-Control-Max-Age", str(CORS_MAX_AGE)),
+    ]
+
+
+class FastPathMiddleware:
+    """Answer ``OPTIONS /api/*`` and ``/healthz`` without entering Flask.
+
+    Preflight headers are built once per allowed origin. ``/healthz`` calls
+    ``readiness()`` and returns 200 or 503 with its details; everything else
+    is passed to the wrapped app unchanged.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        *,
+        allowed_origins: Iterable[str],
+        readiness: Readiness | None = None,
+        api_prefix: str = "/api/",
+        health_path: str = "/healthz",
+    ) -> None:
+        self.app = app
+        self.readiness = readiness
+        self.api_prefix = api_prefix
+        self.health_path = health_path
+        self._preflight_headers = {origin: cors_headers(origin) + [("Content-Length", "0")] for origin in allowed_origins}
+        self._no_cors_headers = [("Content-Length", "0")]
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        path = environ.get("PATH_INFO", "")
+        method = environ.get("REQUEST_METHOD", "")
+        if method == "OPTIONS" and path.startswith(self.api_prefix):
+            origin = environ.get("HTTP_ORIGIN", "")
+            start_response("204 No Content", list(self._preflight_headers.get(origin, self._no_cors_headers)))
+            return [b""]
+        if path == self.health_path and method in ("GET", "HEAD"):
+            return self._health(method, start_response)
+        return self.app(environ, start_response)
+
+    def _health(self, method: str, start_response: Callable) -> Iterable[bytes]:
+        if self.readiness is None:
+            ok, checks = True, {}
+        else:
+            try:
+                ok, checks = self.readiness()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("readiness check crashed")
+                ok, checks = False, {"error": str(exc)}
+        body = json.dumps({"status": "ok" if ok else "unavailable", "checks": checks}, ensure_ascii=False).encode("utf-8")
+        start_response(
+            "200 OK" if ok else "503 Service Unavailable",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                ("Cache-Control", "no-store"),
+            ],
+        )
+        return [b"" if method == "HEAD" else body]
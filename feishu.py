@@ -1,5 +1,5 @@
 #
-# The 'response' is an object, which is an instance of the 'Response' class in the 'requests' library.
+# The 'response' is an object, an instance of 'httpx.Response' (same interface as the 'Response' class in the 'requests' library).
 # It contains the details of the HTTP response, such as status code, response body, headers, etc.
 
 # Common attributes and methods of the 'Response' object include:
@@ -17,12 +17,21 @@
 # print(response.headers)      # Output: Headers dictionary
 
 # feishu.py
-import requests
+import asyncio
+import httpx
 import json
+import queue
 import time
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
 import os
 import re
+import threading
+
+from outbound import ENGINE
 
 # Load environment variables from .env (placed in project root)
 load_dotenv()
@@ -40,25 +49,32 @@ if not CHAT_ID:
     # We don't raise here to allow send_message(text, receive_id=...) usage, but warn in comments.
     pass
 
-# _cached_token will store the tenant_access_token, and _token_expiration_time will store the token's expiration time.
-# 缓存 token；只在进程启动（模块首次加载）时设为 None，不会在后端长时间运行过程中自动重置
-_cached_token = None  # 缓存 token；只在进程启动（模块首次加载）时设为 None，不会在后端长时间运行过程中自动重置
-_token_expiration_time = None  # 缓存过期时间（epoch 秒）；同样只在进程重启/模块重载时重新置 None
-
 # Default HTTP timeout (seconds) for Feishu API calls
 _HTTP_TIMEOUT = 10
 
+# Open API base URL; point it at a stub server (see stub_upstream.py) for replay / load tests
+FEISHU_API_BASE = os.getenv("FEISHU_API_BASE", "https://open.feishu.cn/open-apis").rstrip("/")
+
+# 分隔符：空白、中英文逗号、顿号、中英文分号、间隔号、破折号、连字符
+_SHRINK_SPLIT_RE = re.compile(r"[\s,\uFF0C\u3001;\uFF1B·\u2014\-]+")
+
+
+@lru_cache(maxsize=4096)
+def _shrink_cached(text: str) -> str:
+    parts = [p.strip() for p in _SHRINK_SPLIT_RE.split(text) if p.strip()]
+    if len(parts) >= 2:
+        return ", ".join(parts[-2:])
+    return text.strip()
+
+
 def _shrink_to_task_status_v2(text: str) -> str:
     """Split by wide set of separators and keep the last two segments (task, status).
     Separators: whitespace, ',', '，', '、', ';', '；', '·', '—', '-'
+    Results are cached per text (the same lines are rendered for preview and send).
     """
     if not isinstance(text, str):
         return text
-    import re as _re
-    parts = [p.strip() for p in _re.split(r"[\s,\uFF0C\u3001;\uFF1B·\u2014\-]+", text) if p.strip()]
-    if len(parts) >= 2:
-        return ", ".join(parts[-2:])
-    return text.strip()
+    return _shrink_cached(text)
 
 def _shrink_to_task_status(text: str) -> str:
     """Keep only the last two segments (task, status) from a comma-like separated text.
@@ -75,61 +91,181 @@ def _shrink_to_task_status(text: str) -> str:
 # Feature flag (default on): strip project name from the text part, keep only task + status
 _STRIP_PROJECT = (os.getenv("STRIP_PROJECT_FROM_TEXT", "true").strip().lower() in ("1", "true", "yes", "on"))
 
-def get_tenant_access_token():
-    global _cached_token, _token_expiration_time  # 使用全局变量的规则：
-    # 1) 在函数外先定义变量（如 _cached_token = None）
-    # 2) 在函数内如果只是读取，可以直接用，不需要 global
-    # 3) 在函数内如果要修改，必须加 global，否则会新建局部变量而不是改全局
+# ======================= App credentials (multi-tenant) =======================
+#
+# 默认应用来自 APP_ID / APP_SECRET / CHAT_ID；FEISHU_APPS 可再注册多个机器人（JSON 字符串或 JSON 文件路径）：
+#     {"bot-a": {"appId": "cli_xxx", "appSecret": "xxx", "chatId": "oc_xxx"}, ...}
+# 每个应用有独立的 token 缓存（单飞刷新）和独立的连接池（outbound 引擎上按应用分开的 httpx.AsyncClient）；
+# 当前请求用哪个应用由 contextvar 决定（见 bind_app / use_app），默认是 "default"。
+#
+# 所有对飞书的网络调用都在 outbound.ENGINE 的事件循环上执行（*_async 函数），
+# 同名的同步函数只是把协程交给引擎并等待结果，等待期间不额外占用线程池。
+
+DEFAULT_APP = "default"
+
+
+class FeishuApp:
+    """一个机器人应用：凭证 + 自己的 tenant_access_token 缓存 + 自己的连接池。"""
+
+    def __init__(self, name: str, app_id: str, app_secret: str, *, chat_id: str | None = None):
+        self.name = name
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.chat_id = chat_id
+        # 缓存 token；只在进程启动时为 None，不会在后端长时间运行过程中自动重置
+        self._token: str | None = None
+        self._expires_at = 0.0  # 缓存过期时间（epoch 秒）
+        # 单飞：token 过期时只有一个刷新请求在途，其余调用等它的结果；各应用互不阻塞
+        self._refresh: asyncio.Future | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """本应用的连接池（只能在引擎的事件循环里使用）。"""
+        return ENGINE.client(("feishu", self.name), timeout=_HTTP_TIMEOUT)
+
+    def _valid_token(self) -> str | None:
+        # Check if the cached token is still valid (not expired)
+        token = self._token
+        return token if token and time.time() < self._expires_at else None
+
+    def tenant_access_token(self) -> str:
+        return self._valid_token() or ENGINE.run(self.tenant_access_token_async())
+
+    async def tenant_access_token_async(self) -> str:
+        token = self._valid_token()
+        if token:
+            return token
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._fetch_token())
+            self._refresh.add_done_callback(self._refresh_done)
+        # shield：某个等待方被取消时，刷新本身继续进行，其他等待方不受影响
+        return await asyncio.shield(self._refresh)
 
-    # Check if the cached token is still valid (not expired)
-    if _cached_token and time.time() < _token_expiration_time:
-        return _cached_token
+    def _refresh_done(self, _future) -> None:
+        self._refresh = None
 
-    # If the token has expired or is not available, request a new one
-    url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-    headers = {"Content-Type": "application/json"}
-    payload = {"app_id": APP_ID, "app_secret": APP_SECRET}
+    async def _fetch_token(self) -> str:
+        # If the token has expired or is not available, request a new one
+        url = f"{FEISHU_API_BASE}/auth/v3/tenant_access_token/internal"
+        headers = {"Content-Type": "application/json"}
+        payload = {"app_id": self.app_id, "app_secret": self.app_secret}
 
-    # Send a POST request to get the tenant_access_token
+        # Send a POST request to get the tenant_access_token
+        try:
+            # HTTP 请求超时时间（_HTTP_TIMEOUT 秒）在 client 上设置；与 token 的有效期无关，只限制单次请求的等待时间
+            resp = await self.client.post(url, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            raise Exception(f"Network error when requesting tenant_access_token: {e}")
+        if resp.status_code == 200:  # HTTP 层：200 表示请求成功到达飞书服务器（网络/协议成功）
+            data = resp.json()
+            # 业务层：飞书返回的 JSON 里 code == 0 才表示业务逻辑成功（消息发送成功、token 获取成功等）
+            # - If 'code' is 0, the request is successful, and the 'tenant_access_token' is returned.
+            # - If 'code' is not 0, the API has encountered an error, and the 'msg' field provides details about the error.
+            if data["code"] == 0:
+                self._token = data["tenant_access_token"]
+                # 当前时间戳（秒）+ 过期时长（秒）；两者单位都是秒
+                self._expires_at = time.time() + data["expire"]
+                return self._token
+            raise Exception(f"Token error: {data['msg']}")
+        raise Exception("Failed to get tenant_access_token")
+
+    def token_status(self) -> dict:
+        """健康检查用：缓存 token 有效时直接返回，过期/未获取时尝试刷新一次。"""
+        try:
+            self.tenant_access_token()
+        except Exception as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": True, "expiresIn": int(self._expires_at - time.time())}
+
+
+def _load_apps(spec: str) -> dict[str, FeishuApp]:
+    apps = {DEFAULT_APP: FeishuApp(DEFAULT_APP, APP_ID, APP_SECRET, chat_id=CHAT_ID)}
+    spec = spec.strip()
+    if not spec:
+        return apps
     try:
-        resp = requests.post(
-            url,
-            headers=headers,
-            json=payload,
-            timeout=_HTTP_TIMEOUT  # HTTP 请求超时时间（秒）；与 token 的有效期无关，只限制单次请求的等待时间
-        )
-    except requests.RequestException as e:
-        raise Exception(f"Network error when requesting tenant_access_token: {e}")
-    if resp.status_code == 200:  # HTTP 层：200 表示请求成功到达飞书服务器（网络/协议成功）
-        data = resp.json()
-        # 业务层：飞书返回的 JSON 里 code == 0 才表示业务逻辑成功（消息发送成功、token 获取成功等）
-        # Feishu API returns a response with a 'code' field to indicate whether the request was successful.
-        # - If 'code' is 0, the request is successful, and the 'tenant_access_token' is returned.
-        # - If 'code' is not 0, the API has encountered an error, and the 'msg' field provides details about the error.
-        # The error handling logic in the backend checks the 'code' and raises an exception with the 'msg' if the code indicates failure.
-        if data["code"] == 0:
-            _cached_token = data["tenant_access_token"]
-            # Set the expiration time (current time + expiration duration)
-            _token_expiration_time = time.time() + data["expire"] #            _token_expiration_time = time.time() + data["expire"]  # 当前时间戳（秒）+ 过期时长（秒）；两者单位都是秒
-            return _cached_token
+        if spec.startswith("{"):
+            config = json.loads(spec)
         else:
-            # If the API's 'code' is not 0, it means there was an error, and the error message is in 'msg'.
-            raise Exception(f"Token error: {data['msg']}") # 这里没有 return，因为 raise 会中断函数执行并抛出异常，不会再继续往下执行
-    raise Exception("Failed to get tenant_access_token")
+            with open(spec, encoding="utf-8") as fh:
+                config = json.load(fh)
+    except (OSError, ValueError) as exc:
+        raise RuntimeError(f"FEISHU_APPS is not valid JSON or a readable JSON file: {exc}")
+    if not isinstance(config, dict):
+        raise RuntimeError("FEISHU_APPS must map app names to {appId, appSecret}")
+    for name, cfg in config.items():
+        if not isinstance(cfg, dict) or not cfg.get("appId") or not cfg.get("appSecret"):
+            raise RuntimeError(f"FEISHU_APPS[{name!r}] needs appId and appSecret")
+        apps[name] = FeishuApp(name, cfg["appId"], cfg["appSecret"], chat_id=cfg.get("chatId"))
+    return apps
+
+
+_APPS = _load_apps(os.getenv("FEISHU_APPS", ""))
+_CURRENT_APP: contextvars.ContextVar[FeishuApp | None] = contextvars.ContextVar("feishu_app", default=None)
+
+
+def get_app(name: str | None = None) -> FeishuApp:
+    """按名字取应用；name 为空时返回当前应用。未注册的名字抛 ValueError。"""
+    if not name:
+        return current_app()
+    app = _APPS.get(name)
+    if app is None:
+        raise ValueError(f"Unknown Feishu app: {name}")
+    return app
+
+
+def current_app() -> FeishuApp:
+    return _CURRENT_APP.get() or _APPS[DEFAULT_APP]
+
+
+def app_names() -> list[str]:
+    return list(_APPS)
+
+
+def bind_app(app: FeishuApp | None) -> contextvars.Token:
+    """把 app 设为当前上下文的应用（如整个 HTTP 请求期间），返回值交给 unbind_app 还原。"""
+    return _CURRENT_APP.set(app)
+
+
+def unbind_app(token: contextvars.Token) -> None:
+    _CURRENT_APP.reset(token)
+
+
+@contextmanager
+def use_app(name: str | FeishuApp | None):
+    """with use_app("bot-a"): ... 期间的发送 / 查询都使用该应用的凭证与连接池。"""
+    token = bind_app(name if isinstance(name, FeishuApp) else get_app(name))
+    try:
+        yield current_app()
+    finally:
+        unbind_app(token)
+
+
+def get_tenant_access_token():
+    """当前应用的 tenant_access_token（缓存有效时直接返回）。"""
+    return current_app().tenant_access_token()
+
+def tenant_token_status() -> dict:
+    """健康检查用：缓存 token 有效时直接返回，过期/未获取时尝试刷新一次。"""
+    return current_app().token_status()
 
 def send_message(text, receive_id: str | None = None, receive_id_type: str = "chat_id"):  # receive_id: 消息接收方ID（可选，str 或 None）；若为 None，则默认使用环境变量中的 CHAT_ID
     # 类型标注 str | None → 表示 receive_id 可以是一个字符串（正常 ID），也可以是 None（默认值）。
     # = None → 如果调用时不传这个参数，就会用默认值 None。
+    return ENGINE.run(send_message_async(text, receive_id, receive_id_type, app=current_app()))
+
 
-    token = get_tenant_access_token()
-    url = "https://open.feishu.cn/open-apis/im/v1/messages"
+async def send_message_async(text, receive_id: str | None = None, receive_id_type: str = "chat_id", *, app: "FeishuApp | None" = None):
+    app = app or current_app()
+    token = await app.tenant_access_token_async()
+    url = f"{FEISHU_API_BASE}/im/v1/messages"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
-    
+
     # 复用统一的收件人校验逻辑
-    target_id = _ensure_target_id(receive_id)
+    target_id = _ensure_target_id(receive_id, app)
 
     payload = {
         "receive_id": target_id,          # The recipient ID; could be chat_id or user_id per receive_id_type
@@ -141,21 +277,15 @@ def send_message(text, receive_id: str | None = None, receive_id_type: str = "ch
     params = {
         "receive_id_type": receive_id_type,  # e.g., "chat_id" | "open_id" | "user_id"
     }
-    
+
     # `params` will automatically be converted into a query string and appended to the URL.
     # For example, if the URL is 'https://example.com' and `params = {'key': 'value'}`,
     # the final URL will be 'https://example.com?key=value'.
     try:
-        resp = requests.post(
-            url,
-            headers=headers,
-            params=params,
-            json=payload,
-            timeout=_HTTP_TIMEOUT  # HTTP 请求超时时间（秒）；与 token 的有效期无关，只限制单次请求的等待时间
-        )
-    except requests.RequestException as e:
+        resp = await app.client.post(url, headers=headers, params=params, json=payload)
+    except httpx.HTTPError as e:
         raise Exception(f"Network error when sending message: {e}")
-    
+
     # Check the response status and process the result
     if resp.status_code == 200:
         data = resp.json()
@@ -165,29 +295,33 @@ def send_message(text, receive_id: str | None = None, receive_id_type: str = "ch
             raise Exception(f"Send error: {data['msg']}")
     else:
         raise Exception(f"HTTP error: {resp.status_code} - {resp.text}")
-    
+
 
 # ======================= Rich Text (post) helpers =======================
 
-def _ensure_target_id(receive_id: str | None) -> str:
-    target_id = receive_id or CHAT_ID
+def _ensure_target_id(receive_id: str | None, app: "FeishuApp | None" = None) -> str:
+    target_id = receive_id or (app or current_app()).chat_id
     if not target_id:
         raise ValueError("receive_id is required (set CHAT_ID in .env or pass receive_id explicitly)")
     return target_id
 
 # “_”开头的函数指的是约定成俗的模块内部调用的辅助函数
-def _feishu_post(url: str, headers: dict, params: dict, payload: dict):
+async def _feishu_call(app: FeishuApp, method: str, url: str, *, params: dict | None = None, payload: dict | None = None) -> dict:
+    """带上 app 的 token 调用开放平台接口，返回整个响应 JSON（code == 0 时）。"""
+    token = await app.tenant_access_token_async()
+    headers = {"Authorization": f"Bearer {token}"}
+    if payload is not None:
+        headers["Content-Type"] = "application/json"
     try:
-        resp = requests.post(url, headers=headers, params=params, json=payload, timeout=_HTTP_TIMEOUT)
-#    1.	requests.RequestException
-# 	•	这是 Python requests 库 抛出的异常。
+        resp = await app.client.request(method, url, headers=headers, params=params, json=payload)
+#    1.	httpx.HTTPError（这里实际是 httpx.RequestError / TimeoutException）
 # 	•	发生在 请求都没成功发出或没收到任何响应 的情况：
 # 	•	DNS 解析失败
 # 	•	网络断开
 # 	•	连接超时
 # 	•	服务器完全无响应
 # 👉 这类错误根本没到 HTTP 层，连 resp 对象都没有。
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Network error when sending post: {e}")
     # 	2.	resp.status_code != 200
 	# •	这是 HTTP 层的状态码检查。
@@ -200,7 +334,7 @@ def _feishu_post(url: str, headers: dict, params: dict, payload: dict):
     data = resp.json()
     if data.get("code") != 0:
         raise Exception(f"Feishu API error: {data.get('msg')} (code={data.get('code')})")
-    return True
+    return data
 
 
 def send_post_zh_cn(zh_cn: dict, *, receive_id: str | None = None, receive_id_type: str = "chat_id") -> bool:  # 星号 * 表示后面的参数必须用关键字传递，不能作为位置参数
@@ -215,41 +349,121 @@ def send_post_zh_cn(zh_cn: dict, *, receive_id: str | None = None, receive_id_ty
           ]
         }
     """
-    token = get_tenant_access_token()
-    url = "https://open.feishu.cn/open-apis/im/v1/messages"
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    params = {"receive_id_type": receive_id_type}
-    target_id = _ensure_target_id(receive_id)
+    # 关键点：content 必须是“字符串化 JSON”，且外层为 {"zh_cn": {...}}
+    content = _json_dumps({"zh_cn": zh_cn})
+    return send_post_content(content, receive_id=receive_id, receive_id_type=receive_id_type)
 
+
+def send_post_content(content: str, *, receive_id: str | None = None, receive_id_type: str = "chat_id") -> bool:
+    """发送已序列化好的 post content 字符串；同一内容发给多个目标时只需序列化一次。"""
+    send_post_message(content, receive_id=receive_id, receive_id_type=receive_id_type)
+    return True
+
+
+def send_post_message(content: str, *, receive_id: str | None = None, receive_id_type: str = "chat_id") -> str | None:
+    """同 send_post_content，返回新消息的 message_id（之后可用 update_post_message 编辑）。"""
+    app = current_app()
+    return ENGINE.run(send_post_message_async(content, receive_id=receive_id, receive_id_type=receive_id_type, app=app))
+
+
+async def send_post_message_async(
+    content: str,
+    *,
+    receive_id: str | None = None,
+    receive_id_type: str = "chat_id",
+    app: FeishuApp | None = None,
+) -> str | None:
+    app = app or current_app()
     payload = {
-        "receive_id": target_id,
+        "receive_id": _ensure_target_id(receive_id, app),
         "msg_type": "post",
-        # 关键点：content 必须是“字符串化 JSON”，且外层为 {"zh_cn": {...}}
-        "content": json.dumps({"zh_cn": zh_cn}, ensure_ascii=False)
+        "content": content,
     }
-    return _feishu_post(url, headers, params, payload)
+    data = await _feishu_call(app, "POST", f"{FEISHU_API_BASE}/im/v1/messages", params={"receive_id_type": receive_id_type}, payload=payload)
+    return (data.get("data") or {}).get("message_id")
+
+
+def update_post_message(message_id: str, content: str) -> None:
+    """
+    用 `PUT im/v1/messages/{message_id}` 把已发送的 post 整条替换为 content（编辑消息，群里不会出现新消息）。
+    飞书限制：只能编辑机器人自己发的消息，且单条消息可编辑的次数和时间有限，超限时抛出异常。
+    """
+    ENGINE.run(update_post_message_async(message_id, content, app=current_app()))
+
+
+async def update_post_message_async(message_id: str, content: str, *, app: FeishuApp | None = None) -> None:
+    url = f"{FEISHU_API_BASE}/im/v1/messages/{message_id}"
+    await _feishu_call(app or current_app(), "PUT", url, payload={"msg_type": "post", "content": content})
+
+
+# 渲染用的样式 / 固定节点全模块共享，只读（元组按 JSON 数组序列化），不要原地修改
+_STYLE_BOLD = ("bold",)
+_STYLE_ITALIC = ("italic",)
+_STYLE_ITALIC_BOLD = ("italic", "bold")
+_CHECKBOX_NODE = {"tag": "text", "text": "☐   ", "style": _STYLE_ITALIC}
+_AT_GAP_NODE = {"tag": "text", "text": " ", "style": _STYLE_ITALIC}
+_WEEK_HEADER_LINE = [{"tag": "text", "text": "本周任务:", "style": _STYLE_BOLD}]
+
+# 非默认参数的 json.dumps 每次都会新建 encoder；复用同一个（字符串走 C 实现的转义）
+_json_dumps = json.JSONEncoder(ensure_ascii=False).encode
+_CHECKBOX_JSON = _json_dumps(_CHECKBOX_NODE)
+_AT_GAP_JSON = _json_dumps(_AT_GAP_NODE)
+_WEEK_HEADER_JSON = _json_dumps(_WEEK_HEADER_LINE)
+_WEEK_CONT_HEADER_JSON = _json_dumps([{"tag": "text", "text": "本周任务（续）:", "style": _STYLE_BOLD}])
+_STYLE_ITALIC_BOLD_JSON = _json_dumps(_STYLE_ITALIC_BOLD)
+
+# 富文本消息请求体上限约 30KB；content 在请求体里是 JSON 字符串（中文转义为 \uXXXX），按这个口径计算
+_POST_MAX_BYTES = int(os.getenv("POST_MAX_BYTES", str(28 * 1024)))
+_json_ascii = json.JSONEncoder().encode
+
+
+def _clean_user_ids(user_ids) -> list[str]:
+    return [uid for uid in (user_ids or []) if isinstance(uid, str) and uid.strip()]
+
+
+def _iter_task_lines(items: list[dict]):
+    """逐条产出 (可 @ 的 user_ids, 展示文本)；开启 STRIP_PROJECT 时每条只 shrink 一次。"""
+    for item in items or []:
+        item = item or {}
+        text = item.get("text", "")
+        if _STRIP_PROJECT:
+            text = _shrink_to_task_status_v2(text)
+        yield _clean_user_ids(item.get("user_ids")), text
 
 
 def _make_task_line(user_ids: list[str], text: str) -> list[dict]:
-    """一行任务：☐ + 多个 @user + 文本（斜体+加粗）。user_ids 为可 @ 的 open_id 列表。"""
-    line: list[dict] = [{"tag": "text", "text": "☐   ", "style": ["italic"]}]
-    cleaned_ids = [uid for uid in (user_ids or []) if isinstance(uid, str) and uid.strip()]
+    """一行任务：☐ + 多个 @user + 文本（斜体+加粗）。text 为最终展示文本（已 shrink）。"""
+    cleaned_ids = _clean_user_ids(user_ids)
+    line: list[dict] = [_CHECKBOX_NODE]
     for idx, uid in enumerate(cleaned_ids):
+        if idx:
+            line.append(_AT_GAP_NODE)
         line.append({"tag": "at", "user_id": uid})
-        if idx < len(cleaned_ids) - 1:
-            line.append({"tag": "text", "text": " ", "style": ["italic"]})
     if text:
-        try:
-            # If feature flag is on, shrink text to only task + status
-            if _STRIP_PROJECT:
-                text = _shrink_to_task_status_v2(text)
-        except NameError:
-            pass
         prefix = " " if cleaned_ids else ""
-        line.append({"tag": "text", "text": f"{prefix}{text}", "style": ["italic", "bold"]})
+        line.append({"tag": "text", "text": f"{prefix}{text}", "style": _STYLE_ITALIC_BOLD})
     return line
 
 
+def _task_line_json(user_ids: list[str], text: str) -> str:
+    """与 json.dumps(_make_task_line(...), ensure_ascii=False) 逐字节相同，但不构造中间 dict。"""
+    parts = [_CHECKBOX_JSON]
+    for idx, uid in enumerate(user_ids):
+        if idx:
+            parts.append(_AT_GAP_JSON)
+        parts.append(f'{{"tag": "at", "user_id": {_json_dumps(uid)}}}')
+    if text:
+        prefix = " " if user_ids else ""
+        parts.append(f'{{"tag": "text", "text": {_json_dumps(f"{prefix}{text}")}, "style": {_STYLE_ITALIC_BOLD_JSON}}}')
+    return "[" + ", ".join(parts) + "]"
+
+
+# 解析任务行用到的正则只编译一次，批量预览/发送时复用
+_AT_OPEN_ID_RE = re.compile(r"@ou_[A-Za-z0-9]+")
+_LEADING_OPEN_IDS_RE = re.compile(r"\s*(ou_[A-Za-z0-9]+(?:\s+ou_[A-Za-z0-9]+)*)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def _parse_task_line_multi(ln: str) -> tuple[list[str], str]:
     # 去掉前缀（第N条）
     if ln.startswith("(") and ")" in ln:
@@ -259,11 +473,11 @@ def _parse_task_line_multi(ln: str) -> tuple[list[str], str]:
     # 提取所有 @ou_xxx 或裸 ou_xxx（只取开头连续出现的 id 更稳妥）
     user_ids: list[str] = []
     # 先找所有 @ou_*
-    for m in re.findall(r"@ou_[A-Za-z0-9]+", text):
+    for m in _AT_OPEN_ID_RE.findall(text):
         user_ids.append(m[1:])
     # 若没有 @ 前缀，尝试在开头捕获裸 ou_*
     if not user_ids:
-        m = re.match(r"\s*(ou_[A-Za-z0-9]+(?:\s+ou_[A-Za-z0-9]+)*)", text)
+        m = _LEADING_OPEN_IDS_RE.match(text)
         if m:
             for tok in m.group(1).split():
                 if tok.startswith("ou_"):
@@ -274,7 +488,7 @@ def _parse_task_line_multi(ln: str) -> tuple[list[str], str]:
         rest = rest.replace("@" + uid, " ")
         rest = rest.replace(uid, " ")
     rest = rest.lstrip(", ")
-    rest = re.sub(r"\s+", " ", rest).strip()
+    rest = _WHITESPACE_RE.sub(" ", rest).strip()
     return user_ids, rest
 
 
@@ -283,104 +497,525 @@ def build_post_zh_cn_from_sections(*, title: str, date_label: str, today_items:
     根据两块内容拼装 zh_cn：
     - date_label 任务：today_items = [{"user_ids": ["ou_xxx", "ou_yyy"], "text": "项目 - 任务 - 状态"}, ...]
     - 本周任务：week_items 同上（为空则不渲染本周标题）
-    返回 zh_cn dict，可直接传给 send_post_zh_cn。
+    返回 zh_cn dict，可直接传给 send_post_zh_cn。样式与固定节点是共享对象，调用方不要原地修改。
+    只需要发送时用 render_post_content，直接得到 content 字符串。
     """
-    content_blocks: list[list[dict]] = []
-    # 第一块：日期/今日任务标题
-    content_blocks.append([{ "tag": "text", "text": f"{date_label}任务:", "style": ["bold"] }])
-    if today_items:
-        for item in today_items:
-            user_ids = list((item or {}).get("user_ids") or [])
-            txt = (item or {}).get("text", "")
-            display_txt = _shrink_to_task_status_v2(txt) if _STRIP_PROJECT else txt
-            if user_ids:
-                content_blocks.append(_make_task_line(user_ids, display_txt))
-            else:
-                content_blocks.append(_make_task_line([], display_txt))
-    # 第二块：本周任务（若有）
+    content_blocks: list[list[dict]] = [[{"tag": "text", "text": f"{date_label}任务:", "style": _STYLE_BOLD}]]
+    for user_ids, text in _iter_task_lines(today_items):
+        content_blocks.append(_make_task_line(user_ids, text))
     if week_items:
-        content_blocks.append([{ "tag": "text", "text": "本周任务:", "style": ["bold"] }])
-        for item in week_items:
-            user_ids = list((item or {}).get("user_ids") or [])
-            txt = (item or {}).get("text", "")
-            display_txt = _shrink_to_task_status_v2(txt) if _STRIP_PROJECT else txt
-            if user_ids:
-                content_blocks.append(_make_task_line(user_ids, display_txt))
-            else:
-                content_blocks.append(_make_task_line([], display_txt))
-
+        content_blocks.append(_WEEK_HEADER_LINE)
+        for user_ids, text in _iter_task_lines(week_items):
+            content_blocks.append(_make_task_line(user_ids, text))
     return {"title": title, "content": content_blocks}
 
 
-def send_post_from_summary_text(summary_text: str, *, title: str = "任务汇总", receive_id: str | None = None, receive_id_type: str = "chat_id") -> bool:
+def _section_blocks(date_label: str, today_items: list[dict], week_items: list[dict]) -> list[tuple[str, str, list[str]]]:
+    """按块拆出已序列化的内容：[(标题行, 续页标题行, [任务行, ...]), ...]，本周为空时只有今日一块。"""
+    sections = [(
+        _json_dumps([{"tag": "text", "text": f"{date_label}任务:", "style": _STYLE_BOLD}]),
+        _json_dumps([{"tag": "text", "text": f"{date_label}任务（续）:", "style": _STYLE_BOLD}]),
+        [_task_line_json(user_ids, text) for user_ids, text in _iter_task_lines(today_items)],
+    )]
+    if week_items:
+        sections.append((
+            _WEEK_HEADER_JSON,
+            _WEEK_CONT_HEADER_JSON,
+            [_task_line_json(user_ids, text) for user_ids, text in _iter_task_lines(week_items)],
+        ))
+    return sections
+
+
+def _wrap_content(title: str, blocks: list[str]) -> str:
+    return f'{{"zh_cn": {{"title": {_json_dumps(title)}, "content": [{", ".join(blocks)}]}}}}'
+
+
+def _wire_size(fragment: str) -> int:
+    """fragment 作为 content 的一部分放进请求体后占用的字节数（JSON 字符串转义后，不含引号）。"""
+    return len(_json_ascii(fragment)) - 2
+
+
+def render_post_content(*, title: str, date_label: str, today_items: list[dict], week_items: list[dict]) -> str:
+    """
+    与 json.dumps({"zh_cn": build_post_zh_cn_from_sections(...)}, ensure_ascii=False) 结果相同，
+    但一次遍历直接拼出 content 字符串，不构造中间的 zh_cn dict。
+    """
+    blocks: list[str] = []
+    for header, _, lines in _section_blocks(date_label, today_items, week_items):
+        blocks.append(header)
+        blocks.extend(lines)
+    return _wrap_content(title, blocks)
+
+
+def render_post_parts(
+    *,
+    title: str,
+    date_label: str,
+    today_items: list[dict],
+    week_items: list[dict],
+    max_bytes: int | None = None,
+) -> list[str]:
+    """
+    渲染为一条或多条 content 字符串，每条在请求体中不超过 max_bytes（默认 POST_MAX_BYTES）。
+    - 不超限时只有一条，与 render_post_content 结果相同
+    - 超限时只在块 / 任务行之间切分，标题加编号 "标题 (1/3)"；从块中间续上的部分以 "xx任务（续）:" 开头
+    - 单行任务本身超限时单独成一条（无法再拆）
+    """
+    budget = _POST_MAX_BYTES if max_bytes is None else max_bytes
+    sections = _section_blocks(date_label, today_items, week_items)
+    whole = _wrap_content(title, [b for header, _, lines in sections for b in (header, *lines)])
+    if _wire_size(whole) <= budget:
+        return [whole]
+    return _split_sections(title, sections, budget)
+
+
+def _split_sections(title: str, sections: list[tuple[str, str, list[str]]], budget: int) -> list[str]:
+    """把 _section_blocks 的结果按 budget 切成多条编号 content（调用方已确认整条超限）。"""
+    # 预留编号 " (9999/9999)" 的空间
+    base = _wire_size(_wrap_content(f"{title} (9999/9999)", []))
+    parts: list[list[str]] = []
+    current: list[str] = []
+    size = base
+    has_lines = False
+
+    def add(block: str, block_size: int) -> None:
+        nonlocal size
+        size += block_size + (2 if current else 0)  # 块之间的 ", "
+        current.append(block)
+
+    for header, cont_header, lines in sections:
+        header_size = _wire_size(header)
+        if not lines:
+            add(header, header_size)
+            continue
+        for idx, line in enumerate(lines):
+            line_size = _wire_size(line)
+            # 块标题至少和第一行任务放在同一条里
+            needed = line_size + 2 + (header_size + 2 if idx == 0 else 0)
+            if has_lines and size + needed > budget:
+                parts.append(current)
+                current, size, has_lines = [], base, False
+                if idx:
+                    add(cont_header, _wire_size(cont_header))
+            if idx == 0:
+                add(header, header_size)
+            add(line, line_size)
+            has_lines = True
+    if current:
+        parts.append(current)
+
+    total = len(parts)
+    return [_wrap_content(f"{title} ({no}/{total})", blocks) for no, blocks in enumerate(parts, start=1)]
+
+
+def _parse_summary_sections(summary_text: str) -> tuple[str, list[dict], list[dict]]:
     """
-    从前端传来的 generatedSummaryText 解析并发送富文本：
+    拆出 (date_label, today_items, week_items)：
     - 支持两块：`今日任务:` / `yyyy/MM/dd任务:` 与 `本周任务:`
     - 每行任务形如：`(第1条) @ou_xxx, 项目名称, 任务名称, 状态` 或 `@ou_xxx, 项目, 任务, 状态`
-    - 取第一段视为 user_id（可带前缀 '@'），其余逗号拼为文本
     """
-    def parse_sections(text: str):
-        lines = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
-        date_label = "今日"
-        today_lines, week_lines = [], []
-        current = None
-        for ln in lines:
-            if ln.endswith("任务:"):
-                if ln.startswith("本周"):
-                    current = "week"
-                else:
-                    date_label = ln[:-3]  # 去掉末尾“任务:”
-                    current = "today"
-                continue
-            if current == "today":
-                today_lines.append(ln)
-            elif current == "week":
-                week_lines.append(ln)
-        return date_label, today_lines, week_lines
-
-    def parse_task_line(ln: str):
-        # 去掉前缀“(第N条)”
-        if ln.startswith("(") and ")" in ln:
-            ln = ln.split(")", 1)[1].strip()  # split(")", 1)：第二个参数表示最多分割 1 次，返回 2 个部分，这里取 [1] 即右括号后的内容
-        parts = [p.strip() for p in ln.replace("，", ",").split(",") if p.strip()]
-        user_ids: list[str] = []
-        rest_parts: list[str] = []
-        if parts:
-            for idx, part in enumerate(parts):
-                token = part.strip()
-                if token.startswith("@"):
-                    candidate = token[1:].strip()
-                    if candidate:
-                        user_ids.append(candidate)
-                    continue
-                if idx == 0 and token.startswith("ou_") and not user_ids:
-                    user_ids.append(token)
+    date_label = "今日"
+    today_items: list[dict] = []
+    week_items: list[dict] = []
+    current = None
+    for ln in (summary_text or "").splitlines():
+        ln = ln.strip()
+        if not ln:
+            continue
+        if ln.endswith("任务:"):
+            if ln.startswith("本周"):
+                current = week_items
+            else:
+                date_label = ln[:-3]  # 去掉末尾“任务:”
+                current = today_items
+            continue
+        if current is not None:
+            user_ids, txt = _parse_task_line_multi(ln)
+            current.append({"user_ids": user_ids, "text": txt})
+    return date_label, today_items, week_items
+
+
+def build_post_zh_cn_from_summary_text(summary_text: str, *, title: str = "任务汇总") -> dict:
+    """从前端传来的 generatedSummaryText 解析出 zh_cn（格式见 _parse_summary_sections）。"""
+    date_label, today_items, week_items = _parse_summary_sections(summary_text)
+    return build_post_zh_cn_from_sections(title=title, date_label=date_label, today_items=today_items, week_items=week_items)
+
+
+def render_post_content_from_summary_text(summary_text: str, *, title: str = "任务汇总") -> str:
+    """解析 summary_text 并直接得到可发送的 content 字符串（不切分）。"""
+    date_label, today_items, week_items = _parse_summary_sections(summary_text)
+    return render_post_content(title=title, date_label=date_label, today_items=today_items, week_items=week_items)
+
+
+def render_post_parts_from_summary_text(summary_text: str, *, title: str = "任务汇总", max_bytes: int | None = None) -> list[str]:
+    """解析 summary_text 并按大小切成一条或多条 content（见 render_post_parts）。"""
+    date_label, today_items, week_items = _parse_summary_sections(summary_text)
+    return render_post_parts(
+        title=title,
+        date_label=date_label,
+        today_items=today_items,
+        week_items=week_items,
+        max_bytes=max_bytes,
+    )
+
+
+def send_post_from_summary_text(summary_text: str, *, title: str = "任务汇总", receive_id: str | None = None, receive_id_type: str = "chat_id") -> bool:
+    """解析 summary_text（格式见 _parse_summary_sections）并发送富文本；超出大小上限时按顺序分条发送。"""
+    parts = render_post_parts_from_summary_text(summary_text, title=title)
+    send_post_parts(parts, receive_id=receive_id, receive_id_type=receive_id_type)
+    return True
+
+
+def send_post_parts(parts: list[str], *, receive_id: str | None = None, receive_id_type: str = "chat_id") -> int:
+    """按顺序逐条发送（上一条成功后才发下一条，保证接收方看到的顺序）；返回发送的条数，失败时抛出异常。"""
+    return ENGINE.run(send_post_parts_async(parts, receive_id=receive_id, receive_id_type=receive_id_type, app=current_app()))
+
+
+async def send_post_parts_async(
+    parts: list[str],
+    *,
+    receive_id: str | None = None,
+    receive_id_type: str = "chat_id",
+    app: FeishuApp | None = None,
+) -> int:
+    for content in parts:
+        await send_post_message_async(content, receive_id=receive_id, receive_id_type=receive_id_type, app=app)
+    return len(parts)
+
+
+# 批量发送接口单次最多 200 个 open_id
+_BATCH_SEND_LIMIT = 200
+# 逐个发送（群聊 / 批量接口失败时的兜底）的最大并发
+_BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "8"))
+
+
+def batch_send_post(zh_cn: dict, open_ids: list[str]) -> dict:
+    """
+    调用 `message/v4/batch_send` 把同一条 post 一次发给多个用户（只支持 open_id 等用户维度，不支持群聊）。
+    返回接口 data：{"message_id": "bm_xxx", "invalid_open_ids": [...], ...}
+    """
+    return ENGINE.run(batch_send_post_async(zh_cn, open_ids, app=current_app()))
+
+
+async def batch_send_post_async(zh_cn: dict, open_ids: list[str], *, app: FeishuApp | None = None) -> dict:
+    url = f"{FEISHU_API_BASE}/message/v4/batch_send/"
+    payload = {
+        "msg_type": "post",
+        # 与 im/v1 不同：批量接口的 content 是对象而不是字符串
+        "content": {"post": {"zh_cn": zh_cn}},
+        "open_ids": list(open_ids),
+    }
+    data = await _feishu_call(app or current_app(), "POST", url, payload=payload)
+    return data.get("data") or {}
+
+
+def broadcast_post_zh_cn(
+    zh_cn: dict,
+    *,
+    chat_ids: list[str] = (),
+    open_ids: list[str] = (),
+    concurrency: int | None = None,
+    content: str | None = None,
+    parts: list[str] | None = None,
+    deliver=None,
+):
+    """
+    把同一条 post 发给多个群 / 用户，逐个产出每个接收方的结果（按完成顺序）：
+        {"receiveId": "oc_xxx", "receiveIdType": "chat_id", "status": "success" | "error", "parts": 1, ...}
+    - open_ids：每 200 个走一次批量发送接口；批量接口失败时该批退回逐个发送
+    - chat_ids：批量接口不支持群聊，直接逐个发送
+    逐个发送在 outbound 引擎上并发进行（最多 concurrency 个在途），content 只序列化一次（已有序列化结果时可直接传 content）。
+    parts：超出大小上限时切分好的多条 content（见 render_post_parts）；同一接收方按顺序逐条发送，
+    不同接收方之间仍并行。中途失败时结果为 error，并带上已发送的条数 partsSent。
+    deliver：可选的协程函数 async (receive_id, receive_id_type) -> dict，替代逐个发送（如编辑已发过的消息，
+    见 post_updates.deliver_post_async）；返回的字段并入结果，抛出异常视为该接收方失败。
+    """
+    app = current_app()
+    results: queue.Queue = queue.Queue()
+    finished = object()
+
+    async def pump() -> None:
+        try:
+            async for result in broadcast_post_zh_cn_async(
+                zh_cn, chat_ids=chat_ids, open_ids=open_ids, concurrency=concurrency,
+                content=content, parts=parts, deliver=deliver, app=app,
+            ):
+                results.put(result)
+        finally:
+            results.put(finished)
+
+    future = ENGINE.submit(pump())
+    while True:
+        result = results.get()
+        if result is finished:
+            break
+        yield result
+    future.result()  # 发送过程之外的异常（如参数错误）在这里抛出
+
+
+async def broadcast_post_zh_cn_async(
+    zh_cn: dict,
+    *,
+    chat_ids: list[str] = (),
+    open_ids: list[str] = (),
+    concurrency: int | None = None,
+    content: str | None = None,
+    parts: list[str] | None = None,
+    deliver=None,
+    app: FeishuApp | None = None,
+):
+    """broadcast_post_zh_cn 的协程版本（异步生成器），在引擎的事件循环里使用。"""
+    app = app or current_app()
+    if not parts:
+        parts = [content if content is not None else _json_dumps({"zh_cn": zh_cn})]
+    total = len(parts)
+    # 限制同时在途的请求数（飞书接口有频率限制），不再对应线程数
+    slots = asyncio.Semaphore(max(1, concurrency or _BROADCAST_CONCURRENCY))
+    # 批量接口需要 zh_cn 对象：单条时直接用传入的 zh_cn，多条时按需从各条 content 还原
+    batch_posts: list[dict] = []
+
+    def batch_post(index: int) -> dict:
+        if not batch_posts:
+            if total == 1 and zh_cn is not None:
+                batch_posts.append(zh_cn)
+            else:
+                batch_posts.extend(json.loads(part)["zh_cn"] for part in parts)
+        return batch_posts[index]
+
+    async def send_one(receive_id: str, receive_id_type: str) -> dict:
+        result = {"receiveId": receive_id, "receiveIdType": receive_id_type, "status": "success", "parts": total}
+        async with slots:
+            if deliver is not None:
+                try:
+                    result.update(await deliver(receive_id, receive_id_type))
+                except Exception as exc:
+                    result.update(status="error", message=str(exc))
+                return result
+            for sent, part in enumerate(parts):
+                try:
+                    await send_post_message_async(part, receive_id=receive_id, receive_id_type=receive_id_type, app=app)
+                except Exception as exc:
+                    result.update(status="error", message=str(exc))
+                    if total > 1:
+                        result["partsSent"] = sent
+                    break
+        return result
+
+    async def send_batch(chunk: list[str]) -> list[dict]:
+        # 第一条失败时抛出，由调用方退回逐个发送；之后的条失败只能标记为 error（前面的已送达）
+        async with slots:
+            data = await batch_send_post_async(batch_post(0), chunk, app=app)
+            invalid = set(data.get("invalid_open_ids") or [])
+            message_id = data.get("message_id")
+            valid = [uid for uid in chunk if uid not in invalid]
+            error = None
+            sent = 1
+            for index in range(1, total):
+                if not valid:
+                    break
+                try:
+                    await batch_send_post_async(batch_post(index), valid, app=app)
+                except Exception as exc:
+                    error = str(exc)
+                    break
+                sent += 1
+        results = []
+        for uid in chunk:
+            if uid in invalid:
+                results.append({"receiveId": uid, "receiveIdType": "open_id", "status": "error", "message": "invalid open_id"})
+            elif error is not None:
+                results.append({"receiveId": uid, "receiveIdType": "open_id", "status": "error", "message": error, "parts": total, "partsSent": sent})
+            else:
+                results.append({"receiveId": uid, "receiveIdType": "open_id", "status": "success", "messageId": message_id, "parts": total})
+        return results
+
+    pending = {}
+    for start in range(0, len(open_ids), _BATCH_SEND_LIMIT):
+        chunk = list(open_ids[start:start + _BATCH_SEND_LIMIT])
+        pending[asyncio.ensure_future(send_batch(chunk))] = chunk
+    for chat_id in chat_ids:
+        pending[asyncio.ensure_future(send_one(chat_id, "chat_id"))] = None
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                chunk = pending.pop(task)
+                if chunk is None:
+                    yield task.result()
                     continue
-                if idx == 0 and not user_ids:
-                    # 兼容旧格式：首段视为 user_id
-                    user_ids.append(token[1:] if token.startswith("@") else token)
+                try:
+                    batch_results = task.result()
+                except Exception:
+                    # 批量接口不可用（如缺少权限）时，这一批退回逐个发送
+                    for uid in chunk:
+                        pending[asyncio.ensure_future(send_one(uid, "open_id"))] = None
                     continue
-                rest_parts.append(token)
-        rest = ", ".join(rest_parts)
-        # 去除空 user_id
-        user_ids = [uid for uid in user_ids if uid]
-        return user_ids, rest
-
-    date_label, today_raw, week_raw = parse_sections(summary_text)
-    today_items = []
-    for ln in today_raw:
-        user_ids, txt = _parse_task_line_multi(ln)
-        today_items.append({"user_ids": user_ids, "text": txt})
-    week_items = []
-    for ln in week_raw:
-        user_ids, txt = _parse_task_line_multi(ln)
-        week_items.append({"user_ids": user_ids, "text": txt})
-
-    zh_cn = build_post_zh_cn_from_sections(title=title, date_label=date_label, today_items=today_items, week_items=week_items)
-    return send_post_zh_cn(zh_cn, receive_id=receive_id, receive_id_type=receive_id_type)
+                for result in batch_results:
+                    yield result
+    finally:
+        # 调用方提前停止迭代时不留下悬空的发送任务
+        for task in pending:
+            task.cancel()
 
 # ===================== End Rich Text (post) helpers =====================
 
+# ======================= Contact (user name) helpers =======================
+
+class _LRUTTLCache:
+    """线程安全的 LRU + TTL 缓存：超过 maxsize 淘汰最久未用的条目，超过 ttl 秒的条目视为未命中。
+    可选 maxbytes + sizeof：按估算字节数再限制一次总量（单个超限的值不缓存）。"""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float, *, maxbytes: int = 0, sizeof=None):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.maxbytes = max(0, int(maxbytes))
+        self._sizeof = sizeof
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+            expires_at, value, size = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        size = self._sizeof(value) if self._sizeof else 0
+        if self.maxbytes and size > self.maxbytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (time.time() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes and self._bytes > self.maxbytes):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "maxEntries": self.maxsize,
+                "bytes": self._bytes,
+                "maxBytes": self.maxbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "ttl": self.ttl,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# open_id -> 姓名（查不到的 id 缓存为 None，避免每次预览都重复查询）
+_USER_NAME_CACHE = _LRUTTLCache(
+    maxsize=int(os.getenv("USER_NAME_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("USER_NAME_CACHE_TTL", "3600")),
+)
+
+
+def user_name_cache_stats() -> dict:
+    return _USER_NAME_CACHE.stats()
+
+
+# 通讯录批量查询接口单次最多 50 个 user_ids
+_USER_BATCH_LIMIT = 50
+
+
+async def _feishu_get_async(app: FeishuApp, url: str, params: dict) -> dict:
+    token = await app.tenant_access_token_async()
+    try:
+        resp = await app.client.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    except httpx.HTTPError as e:
+        raise Exception(f"Network error when calling {url}: {e}")
+    if resp.status_code != 200:
+        raise Exception(f"HTTP error: {resp.status_code} - {resp.text}")
+    data = resp.json()
+    if data.get("code") != 0:
+        raise Exception(f"Feishu API error: {data.get('msg')} (code={data.get('code')})")
+    return data.get("data") or {}
+
+
+def resolve_user_names(open_ids: list[str]) -> dict[str, str | None]:
+    """
+    批量把 open_id 解析为显示名：先查本地 LRU/TTL 缓存，未命中的 id 合并为一次
+    `contact/v3/users/batch` 调用（每 50 个一批）。返回 {open_id: name 或 None}。
+    缓存全部命中时不发起任何网络请求。open_id 按应用区分，缓存也按当前应用分开。
+    """
+    app = current_app()
+    names, missing = _cached_user_names(app, open_ids)
+    if missing:
+        names.update(ENGINE.run(_fetch_user_names(app, missing)))
+    return names
+
+
+async def resolve_user_names_async(open_ids: list[str], *, app: FeishuApp | None = None) -> dict[str, str | None]:
+    app = app or current_app()
+    names, missing = _cached_user_names(app, open_ids)
+    if missing:
+        names.update(await _fetch_user_names(app, missing))
+    return names
+
+
+def _cached_user_names(app: FeishuApp, open_ids: list[str]) -> tuple[dict[str, str | None], list[str]]:
+    wanted: list[str] = []
+    seen: set[str] = set()
+    for uid in open_ids or []:
+        if isinstance(uid, str) and uid.strip() and uid not in seen:
+            seen.add(uid)
+            wanted.append(uid)
+
+    names: dict[str, str | None] = {}
+    missing: list[str] = []
+    for uid in wanted:
+        cached = _USER_NAME_CACHE.get((app.name, uid), _LRUTTLCache._MISSING)
+        if cached is _LRUTTLCache._MISSING:
+            missing.append(uid)
+        else:
+            names[uid] = cached
+    return names, missing
+
+
+async def _fetch_user_names(app: FeishuApp, missing: list[str]) -> dict[str, str | None]:
+    url = f"{FEISHU_API_BASE}/contact/v3/users/batch"
+    names: dict[str, str | None] = {}
+    for start in range(0, len(missing), _USER_BATCH_LIMIT):
+        chunk = missing[start:start + _USER_BATCH_LIMIT]
+        # user_ids 为列表时 httpx 会展开为 user_ids=a&user_ids=b
+        data = await _feishu_get_async(app, url, {"user_ids": chunk, "user_id_type": "open_id"})
+        found = {it.get("open_id"): it.get("name") for it in (data.get("items") or [])}
+        for uid in chunk:
+            name = found.get(uid)
+            _USER_NAME_CACHE.set((app.name, uid), name)
+            names[uid] = name
+    return names
+
+# ===================== End Contact (user name) helpers =====================
+
 if __name__ == "__main__":
     # 获取 token 并进行打印
     token = get_tenant_access_token()   
@@ -0,0 +1,13 @@
+"""Latency summary helpers shared by replay.py and bulk_send.py."""
+
+from __future__ import annotations
+
+from typing import List
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of ``values`` (``p`` in 0..1); 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
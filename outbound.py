@@ -0,0 +1,152 @@
+"""Shared asyncio engine for outbound HTTP (Feishu open API, Anycross webhooks).
+
+One daemon thread runs an event loop; callers on any thread hand it
+coroutines with :meth:`OutboundEngine.submit` (returns a
+``concurrent.futures.Future``) or :meth:`OutboundEngine.run` (blocks for the
+result). Waiting on upstream replies therefore costs a coroutine, not an OS
+thread: thousands of in-flight calls share the loop thread and whichever
+threads are waiting on their futures.
+
+HTTP clients are ``httpx.AsyncClient`` instances created lazily on the loop,
+one per key (per Feishu app, per TLS setting), so each keeps its own
+connection pool. ``OUTBOUND_MAX_CONNECTIONS`` / ``OUTBOUND_MAX_KEEPALIVE``
+bound each pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Hashable, TypeVar
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO; keep app.log readable under load
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+OUTBOUND_MAX_CONNECTIONS = int(os.getenv("OUTBOUND_MAX_CONNECTIONS", "1000"))
+OUTBOUND_MAX_KEEPALIVE = int(os.getenv("OUTBOUND_MAX_KEEPALIVE", "100"))
+
+T = TypeVar("T")
+
+
+class OutboundEngine:
+    """An event loop on a dedicated thread plus keyed ``httpx.AsyncClient`` pools.
+
+    The loop thread is started on first use. Coroutines must not call
+    :meth:`run` (that would block the loop on itself); they ``await`` instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = OUTBOUND_MAX_CONNECTIONS,
+        max_keepalive: int = OUTBOUND_MAX_KEEPALIVE,
+        name: str = "outbound",
+    ) -> None:
+        self.name = name
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._clients: Dict[Hashable, httpx.AsyncClient] = {}
+        # updated on the loop thread only
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run_loop, args=(loop,), name=f"{self.name}-loop", daemon=True)
+                thread.start()
+                self._thread = thread
+                self._loop = loop
+                logger.info("Outbound engine started (max_connections=%s)", self.limits.max_connections)
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def in_loop(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    async def _tracked(self, aw: Awaitable[T]) -> T:
+        self.in_flight += 1
+        if self.in_flight > self.peak_in_flight:
+            self.peak_in_flight = self.in_flight
+        try:
+            return await aw
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def submit(self, aw: Awaitable[T]) -> "Future[T]":
+        """Schedule ``aw`` on the engine loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(self._tracked(aw), self._ensure_loop())
+
+    def run(self, aw: Awaitable[T], timeout: float | None = None) -> T:
+        """Run ``aw`` on the engine loop and block the calling thread for its result."""
+        if self.in_loop():
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise RuntimeError("OutboundEngine.run() called on the engine loop; await the coroutine instead")
+        return self.submit(aw).result(timeout)
+
+    def client(self, key: Hashable, **kwargs: Any) -> httpx.AsyncClient:
+        """The pooled client for ``key``, created on first use (call on the loop)."""
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(limits=self.limits, **kwargs)
+        return client
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "inFlight": self.in_flight,
+            "peakInFlight": self.peak_in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "clients": len(self._clients),
+            "maxConnections": self.limits.max_connections,
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Close all clients and stop the loop (tests / orderly shutdown)."""
+        loop = self._loop
+        if loop is None:
+            return
+
+        async def _close() -> None:
+            clients, self._clients = list(self._clients.values()), {}
+            for client in clients:
+                await client.aclose()
+
+        if not self.in_loop():
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout)
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout)
+            loop.close()
+        with self._start_lock:
+            self._loop = None
+            self._thread = None
+
+
+# Process-wide engine used by feishu.py, post_updates.py and task_sync_service.py.
+ENGINE = OutboundEngine()
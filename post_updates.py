@@ -0,0 +1,209 @@
+"""Edit-in-place delivery of summaries that were already sent to a chat.
+
+The message ids of the last summary sent to each (bot app, chat, title,
+date label) are remembered in memory. When the same day's summary is sent again, a
+cheap item-level diff against what was sent decides what happens:
+
+* ``noop``: the rendered content is identical, nothing is sent;
+* ``edit``: the existing message(s) are replaced through the message update
+  API (only the parts whose content changed), so the group sees no new
+  message;
+* ``new``: a fresh post is sent and remembered. This happens for the first
+  summary of the day, when the number of parts changed, when the message has
+  been edited ``POST_EDIT_MAX_EDITS`` times, when more than
+  ``POST_EDIT_REPOST_RATIO`` of the items were added or removed (so the
+  change is announced), or when the edit is rejected (e.g. the message was
+  recalled).
+
+Status changes of existing items never trigger a new post. State is
+per-process and lost on restart; the next send is then a new post.
+
+:func:`deliver_post_async` runs on the outbound engine loop (broadcasts
+call it there directly); :func:`deliver_post` is the blocking wrapper.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import weakref
+from typing import Any, Dict, List, Tuple
+
+from feishu import (
+    FeishuApp,
+    _LRUTTLCache,
+    _SHRINK_SPLIT_RE,
+    current_app,
+    send_post_message_async,
+    update_post_message_async,
+)
+from outbound import ENGINE
+from render_cache import RenderedPost
+
+
+logger = logging.getLogger(__name__)
+
+NEW = "new"
+EDIT = "edit"
+NOOP = "noop"
+
+POST_EDIT_ENABLED = os.getenv("POST_EDIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+POST_EDIT_TTL = float(os.getenv("POST_EDIT_TTL", str(36 * 3600)))
+POST_EDIT_REGISTRY_SIZE = int(os.getenv("POST_EDIT_REGISTRY_SIZE", "4096"))
+POST_EDIT_MAX_EDITS = int(os.getenv("POST_EDIT_MAX_EDITS", "20"))
+POST_EDIT_REPOST_RATIO = float(os.getenv("POST_EDIT_REPOST_RATIO", "0.5"))
+
+# Item identity for the diff: section, mentioned users and the task text
+# without its last segment (the status). Same identity + other status = changed.
+_ItemKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class SentPost:
+    """What was last delivered to one chat for one (title, date label)."""
+
+    __slots__ = ("message_ids", "part_digests", "items", "edits", "sent_at", "updated_at")
+
+    def __init__(self, message_ids: List[str], part_digests: List[bytes], items: Dict[_ItemKey, str]) -> None:
+        self.message_ids = message_ids
+        self.part_digests = part_digests
+        self.items = items
+        self.edits = 0
+        self.sent_at = self.updated_at = time.time()
+
+
+_REGISTRY = _LRUTTLCache(maxsize=POST_EDIT_REGISTRY_SIZE, ttl=POST_EDIT_TTL)
+# one lock per key: concurrent sends of the same summary to the same chat must
+# not both post. Only touched on the engine loop, so no guard is needed.
+_key_locks: "weakref.WeakValueDictionary[tuple, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _lock_for(key: tuple) -> asyncio.Lock:
+    lock = _key_locks.get(key)
+    if lock is None:
+        lock = _key_locks[key] = asyncio.Lock()
+    return lock
+
+
+def _digest(content: str) -> bytes:
+    return hashlib.sha256(content.encode("utf-8")).digest()
+
+
+def _item_map(post: RenderedPost) -> Dict[_ItemKey, str]:
+    items: Dict[_ItemKey, str] = {}
+    for section, section_items in (("today", post.today_items), ("week", post.week_items)):
+        for item in section_items:
+            segments = [p for p in _SHRINK_SPLIT_RE.split(item.get("text") or "") if p.strip()]
+            status = segments[-1] if len(segments) >= 2 else ""
+            key = (section, tuple(item.get("user_ids") or ()), tuple(segments[:-1] if status else segments))
+            # duplicated lines: keep them apart so they are not reported as changed
+            while key in items:
+                key = key[:2] + (key[2] + ("",),)
+            items[key] = status
+    return items
+
+
+def diff_items(old: Dict[_ItemKey, str], new: Dict[_ItemKey, str]) -> Dict[str, int]:
+    """Counts of added / removed / changed (status only) / unchanged items."""
+    common = old.keys() & new.keys()
+    changed = sum(1 for key in common if old[key] != new[key])
+    return {
+        "added": len(new) - len(common),
+        "removed": len(old) - len(common),
+        "changed": changed,
+        "unchanged": len(common) - changed,
+    }
+
+
+def _registry_key(app: FeishuApp, receive_id: str, post: RenderedPost) -> tuple:
+    # "今日" recurs every day: scope it to the calendar date so yesterday's message is never edited
+    day = time.strftime("%Y-%m-%d") if post.date_label == "今日" else ""
+    # a bot can only edit its own messages
+    return (app.name, receive_id, post.title, post.date_label, day)
+
+
+def _decide(sent: SentPost | None, digests: List[bytes], diff: Dict[str, int] | None) -> str:
+    if sent is None:
+        return NEW
+    if sent.part_digests == digests:
+        return NOOP
+    if len(sent.message_ids) != len(digests) or sent.edits >= POST_EDIT_MAX_EDITS:
+        return NEW
+    total = max(len(sent.items), diff["added"] + diff["changed"] + diff["unchanged"], 1)
+    if (diff["added"] + diff["removed"]) / total > POST_EDIT_REPOST_RATIO:
+        return NEW
+    return EDIT
+
+
+def deliver_post(post: RenderedPost, *, receive_id: str, receive_id_type: str = "chat_id", edit: bool = True) -> Dict[str, Any]:
+    """Send ``post`` to one recipient, editing the earlier message of the day when possible.
+
+    Returns ``{"action": "new" | "edit" | "noop", "parts": n, "messageIds": [...], "diff": {...}}``
+    (``diff`` only when there was an earlier message). ``edit=False`` always
+    sends a new post (which then becomes the one later sends edit). Raises on
+    send failure, like ``send_post_content``.
+    """
+    return ENGINE.run(deliver_post_async(
+        post, receive_id=receive_id, receive_id_type=receive_id_type, edit=edit, app=current_app()
+    ))
+
+
+async def deliver_post_async(
+    post: RenderedPost,
+    *,
+    receive_id: str,
+    receive_id_type: str = "chat_id",
+    edit: bool = True,
+    app: FeishuApp | None = None,
+) -> Dict[str, Any]:
+    """Coroutine form of :func:`deliver_post`; await it on the engine loop."""
+    app = app or current_app()
+    key = _registry_key(app, receive_id, post)
+    digests = [_digest(part) for part in post.parts]
+    items = _item_map(post)
+    async with _lock_for(key):
+        sent = _REGISTRY.get(key) if edit else None
+        diff = diff_items(sent.items, items) if sent is not None else None
+        action = _decide(sent, digests, diff)
+        parts_sent = 0  # messages posted or edited
+
+        if action == EDIT:
+            try:
+                for index, part in enumerate(post.parts):
+                    if sent.part_digests[index] != digests[index]:
+                        await update_post_message_async(sent.message_ids[index], part, app=app)
+                        parts_sent += 1
+                        # recorded per part, so a retry after a failure only touches what is left
+                        sent.part_digests[index] = digests[index]
+                sent.items = items
+                sent.edits += 1
+                sent.updated_at = time.time()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("editing %s in %s failed, sending a new post: %s", sent.message_ids, receive_id, exc)
+                action = NEW
+
+        if action == NEW:
+            message_ids = [
+                await send_post_message_async(part, receive_id=receive_id, receive_id_type=receive_id_type, app=app) or ""
+                for part in post.parts
+            ]
+            parts_sent += len(message_ids)
+            sent = SentPost(message_ids, digests, items)
+            if all(message_ids):
+                _REGISTRY.set(key, sent)
+
+        result: Dict[str, Any] = {
+            "action": action,
+            "parts": len(post.parts),
+            "partsSent": parts_sent,
+            "messageIds": list(sent.message_ids),
+        }
+        if diff is not None:
+            result["diff"] = diff
+        return result
+
+
+def post_edit_stats() -> Dict[str, Any]:
+    return {"enabled": POST_EDIT_ENABLED, **_REGISTRY.stats()}
@@ -0,0 +1,169 @@
+"""Sampled cProfile hook for live requests.
+
+Off by default. When enabled (``PROFILE_ENABLED=1`` or the admin endpoint),
+1 in ``PROFILE_SAMPLE_RATE`` requests, and/or every request whose path
+matches ``PROFILE_ROUTES``, is run under cProfile. Each profile is written as a
+pstats ``.prof`` file under ``PROFILE_DIR`` (snakeviz / flameprof /
+gprof2dot can turn it into a flame graph), and only the newest
+``PROFILE_KEEP`` files are kept.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+# 1-in-N sampling; 0 profiles only PROFILE_ROUTES matches.
+PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "100"))
+PROFILE_ROUTES = os.getenv("PROFILE_ROUTES", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(Path(__file__).resolve().parent / "logs" / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests, including the iteration of streamed bodies.
+
+    Unsampled requests cost one attribute check while disabled, and a counter
+    increment (plus the route regex, if set) while enabled. Only one request
+    is profiled at a time; a sample that arrives meanwhile is skipped.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        *,
+        enabled: bool = PROFILE_ENABLED,
+        sample_rate: int = PROFILE_SAMPLE_RATE,
+        routes: str = PROFILE_ROUTES,
+        directory: str = PROFILE_DIR,
+        keep: int = PROFILE_KEEP,
+    ) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self.profiled = 0
+        self.skipped = 0
+        self._counter = itertools.count(1)
+        self._file_seq = itertools.count(1)
+        self._busy = threading.Lock()
+        self._files_lock = threading.Lock()
+        self.enabled = False
+        self.sample_rate = 0
+        self._routes: re.Pattern[str] | None = None
+        self.configure(enabled=enabled, sample_rate=sample_rate, routes=routes)
+
+    def configure(self, *, enabled: bool | None = None, sample_rate: int | None = None, routes: str | None = None) -> None:
+        """Update settings at runtime; raises ValueError for a bad rate or regex."""
+        if sample_rate is not None:
+            if sample_rate < 0:
+                raise ValueError("sampleRate must be >= 0")
+            self.sample_rate = sample_rate
+        if routes is not None:
+            try:
+                self._routes = re.compile(routes) if routes else None
+            except re.error as exc:
+                raise ValueError(f"invalid routes regex: {exc}") from exc
+        if enabled is not None:
+            if enabled:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            self.enabled = enabled
+        logger.info(
+            "Profiling %s: sample_rate=%s routes=%s dir=%s",
+            "enabled" if self.enabled else "disabled",
+            self.sample_rate,
+            self.routes or "-",
+            self.directory,
+        )
+
+    @property
+    def routes(self) -> str:
+        return self._routes.pattern if self._routes is not None else ""
+
+    def _sampled(self, path: str) -> bool:
+        if self._routes is not None and self._routes.search(path):
+            return True
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if not self.enabled or not self._sampled(environ.get("PATH_INFO", "")):
+            return self.app(environ, start_response)
+        return self._profile(environ, start_response)
+
+    def _profile(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        # acquired here rather than in __call__: a generator closed before its
+        # first iteration never runs its finally block
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            result = self.app(environ, start_response)
+            try:
+                yield from result
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+            return
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        result = None
+        try:
+            profile.enable()
+            result = self.app(environ, start_response)
+            for chunk in result:
+                profile.disable()
+                yield chunk
+                profile.enable()
+        finally:
+            profile.disable()
+            try:
+                if result is not None and hasattr(result, "close"):
+                    result.close()
+            finally:
+                self._busy.release()
+                self._save(profile, environ, time.perf_counter() - started)
+
+    def _save(self, profile: cProfile.Profile, environ: Dict[str, Any], elapsed: float) -> None:
+        try:
+            slug = _SLUG_RE.sub("-", environ.get("PATH_INFO", "")).strip("-")[:60] or "root"
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{environ.get('REQUEST_METHOD', '')}-{slug}-{elapsed * 1000:.0f}ms-{next(self._file_seq)}.prof"
+            profile.dump_stats(str(self.directory / name))
+            self.profiled += 1
+            self._prune()
+        except Exception:  # noqa: BLE001
+            logger.exception("failed to save profile for %s", environ.get("PATH_INFO"))
+
+    def _prune(self) -> None:
+        with self._files_lock:
+            files = sorted(self.directory.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+            for stale in files[: max(0, len(files) - self.keep)]:
+                stale.unlink(missing_ok=True)
+
+    def recent_files(self, limit: int = 10) -> List[str]:
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [p.name for p in files[:limit]]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sampleRate": self.sample_rate,
+            "routes": self.routes,
+            "dir": str(self.directory),
+            "keep": self.keep,
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+            "recent": self.recent_files(),
+        }
@@ -0,0 +1,187 @@
+"""Opt-in WSGI middleware appending sanitized API requests to a JSONL capture.
+
+Each line describes one request: arrival time, method, path, query, body and
+how long the app took. ``replay.py`` plays a capture back against a local
+instance. Enable with ``REQUEST_RECORD=1``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode
+
+
+logger = logging.getLogger(__name__)
+
+RECORD_ENABLED = os.getenv("REQUEST_RECORD", "").strip().lower() in ("1", "true", "yes", "on")
+RECORD_PATH = os.getenv("REQUEST_RECORD_PATH", str(Path(__file__).resolve().parent / "logs" / "capture.jsonl"))
+# Bodies longer than this are stored as size only.
+RECORD_MAX_BODY = int(os.getenv("REQUEST_RECORD_MAX_BODY", str(1024 * 1024)))
+
+REDACTED = "<redacted>"
+# Keys whose values never leave the process (matched case-insensitively, anywhere in the key).
+_SENSITIVE_KEY_RE = re.compile(r"token|secret|password|authorization|cookie|webhook", re.IGNORECASE)
+
+
+def sanitize(value: Any) -> Any:
+    """Copy of a JSON value with sensitive keys replaced by ``<redacted>``."""
+    if isinstance(value, dict):
+        return {k: REDACTED if _SENSITIVE_KEY_RE.search(str(k)) else sanitize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def sanitize_query(query: str) -> str:
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(k, REDACTED if _SENSITIVE_KEY_RE.search(k) else v) for k, v in pairs])
+
+
+def _sanitize_body(raw: bytes, content_type: str) -> Dict[str, Any]:
+    text = raw.decode("utf-8", errors="replace")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        lines = []
+        for line in text.splitlines():
+            try:
+                lines.append(json.dumps(sanitize(json.loads(line)), ensure_ascii=False))
+            except ValueError:
+                lines.append(line)
+        return {"bodyText": "\n".join(lines) + "\n"}
+    try:
+        return {"body": sanitize(json.loads(text))} if text else {}
+    except ValueError:
+        return {"bodyText": text}
+
+
+_REPLY_SCAN_LIMIT = 4096
+
+
+def _job_id_from_reply(reply: bytes | None) -> str | None:
+    if not reply or b"jobId" not in reply:
+        return None
+    try:
+        data = json.loads(reply)
+    except ValueError:
+        return None  # e.g. a compressed body
+    job_id = data.get("jobId") if isinstance(data, dict) else None
+    return job_id if isinstance(job_id, str) else None
+
+
+class _TeeInput:
+    """Wraps ``wsgi.input`` and keeps a copy of what the app reads (up to a limit)."""
+
+    def __init__(self, stream: Any, limit: int) -> None:
+        self._stream = stream
+        self._limit = limit
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def _keep(self, data: bytes) -> bytes:
+        if self.size <= self._limit:
+            self.chunks.append(data)
+        self.size += len(data)
+        return data
+
+    def read(self, *args: Any) -> bytes:
+        return self._keep(self._stream.read(*args))
+
+    def readline(self, *args: Any) -> bytes:
+        return self._keep(self._stream.readline(*args))
+
+    def readlines(self, *args: Any) -> List[bytes]:
+        return [self._keep(line) for line in self._stream.readlines(*args)]
+
+    def __iter__(self):
+        for line in self._stream:
+            yield self._keep(line)
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > self._limit
+
+
+class RequestRecorder:
+    """Record requests under ``prefix`` (default ``/api/``) to ``path``.
+
+    Timing covers the whole response, including streamed bodies, and is
+    written once the server closes the response iterable. Write failures are
+    logged and never affect the response.
+    """
+
+    def __init__(self, app: Callable, *, path: str = RECORD_PATH, prefix: str = "/api/", max_body: int = RECORD_MAX_BODY) -> None:
+        self.app = app
+        self.path = Path(path)
+        self.prefix = prefix
+        self.max_body = max_body
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info("Request recording enabled: %s", self.path)
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        if not environ.get("PATH_INFO", "").startswith(self.prefix):
+            return self.app(environ, start_response)
+        return self._record(environ, start_response)
+
+    def _record(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        started_wall = time.time()
+        started = time.perf_counter()
+        tee = _TeeInput(environ["wsgi.input"], self.max_body)
+        environ["wsgi.input"] = tee
+        state: Dict[str, Any] = {}
+
+        def recording_start_response(status: str, headers: List, exc_info: Any = None):
+            state["status"] = int(status.split(" ", 1)[0])
+            state["ttfb"] = time.perf_counter() - started
+            state["json"] = any(k.lower() == "content-type" and v.startswith("application/json") for k, v in headers)
+            return start_response(status, headers, exc_info) if exc_info else start_response(status, headers)
+
+        result = self.app(environ, recording_start_response)
+        # small JSON replies are kept to pick up jobId, so replay can map status polls
+        reply: List[bytes] = []
+        reply_size = 0
+        try:
+            for chunk in result:
+                if state.get("json") and reply_size < _REPLY_SCAN_LIMIT:
+                    reply.append(chunk)
+                    reply_size += len(chunk)
+                yield chunk
+        finally:
+            if reply and reply_size < _REPLY_SCAN_LIMIT:
+                state["reply"] = b"".join(reply)
+            if hasattr(result, "close"):
+                result.close()
+            self._write(environ, tee, state, started_wall, time.perf_counter() - started)
+
+    def _write(self, environ: Dict[str, Any], tee: _TeeInput, state: Dict[str, Any], ts: float, duration: float) -> None:
+        try:
+            content_type = environ.get("CONTENT_TYPE", "")
+            entry: Dict[str, Any] = {
+                "ts": round(ts, 3),
+                "method": environ.get("REQUEST_METHOD", ""),
+                "path": environ.get("PATH_INFO", ""),
+                "query": sanitize_query(environ.get("QUERY_STRING", "")),
+                "contentType": content_type,
+                "status": state.get("status"),
+                "durationMs": round(duration * 1000, 2),
+                "ttfbMs": round(state.get("ttfb", duration) * 1000, 2),
+                "bodySize": tee.size,
+            }
+            job_id = _job_id_from_reply(state.get("reply"))
+            if job_id:
+                entry["jobId"] = job_id
+            if tee.truncated:
+                entry["bodyTruncated"] = True
+            elif tee.size:
+                entry.update(_sanitize_body(b"".join(tee.chunks), content_type))
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            with self._lock, self.path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+        except Exception:  # noqa: BLE001
+            logger.exception("failed to record request %s", environ.get("PATH_INFO"))
@@ -0,0 +1,192 @@
+"""Cache of parsed + rendered summaries shared by the preview and send paths.
+
+Two layers: rendered posts are cached per (summary, title, STRIP_PROJECT, mode),
+and the title-independent rendering of the parsed items (serialized task lines
+and the zh_cn content list) is cached per item list. A summary that parses to
+the same items in both modes (a ``今日任务:`` block of ``@`` lines) renders its
+lines once for the dry-run preview and reuses them for the send, which only
+wraps them with its own title.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+import feishu
+from feishu import (
+    _LRUTTLCache,
+    _parse_summary_sections,
+    _parse_task_line_multi,
+    _section_blocks,
+    _split_sections,
+    _wire_size,
+    _wrap_content,
+    build_post_zh_cn_from_sections,
+)
+
+
+# Parse modes: SECTIONS understands the "今日任务:" / "本周任务:" headers (send
+# paths); MENTIONS takes every line starting with "@" as a today item
+# (dry-run / debug preview). Items parsed in MENTIONS mode keep their "raw" line.
+SECTIONS = "sections"
+MENTIONS = "mentions"
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "256"))
+RENDER_CACHE_TTL = float(os.getenv("RENDER_CACHE_TTL", "600"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class _PostBody:
+    """Title-independent rendering of one parsed item list; shared by every title and parse mode."""
+
+    __slots__ = ("date_label", "today_items", "week_items", "sections", "joined", "wire_size", "nbytes", "_zh_cn_content")
+
+    def __init__(self, date_label: str, today_items: List[Dict[str, Any]], week_items: List[Dict[str, Any]]) -> None:
+        self.date_label = date_label
+        self.today_items = today_items
+        self.week_items = week_items
+        self.sections = _section_blocks(date_label, today_items, week_items)
+        self.joined = ", ".join(block for header, _, lines in self.sections for block in (header, *lines))
+        # escaping is per character, so the wire size of a wrapped post is
+        # the wrapper's size plus this
+        self.wire_size = _wire_size(self.joined)
+        self._zh_cn_content: List[List[Dict[str, Any]]] | None = None
+        self.nbytes = self._estimate_size()
+
+    @property
+    def zh_cn_content(self) -> List[List[Dict[str, Any]]]:
+        if self._zh_cn_content is None:
+            self._zh_cn_content = build_post_zh_cn_from_sections(
+                title="",
+                date_label=self.date_label,
+                today_items=self.today_items,
+                week_items=self.week_items,
+            )["content"]
+        return self._zh_cn_content
+
+    def _estimate_size(self) -> int:
+        # joined string + the per-line strings in sections + items, doubled for the lazily built zh_cn content
+        size = sys.getsizeof(self.joined) * 2
+        for item in self.today_items + self.week_items:
+            size += 200 + sum(sys.getsizeof(v) for v in item.values() if isinstance(v, str))
+            size += sum(sys.getsizeof(uid) for uid in item.get("user_ids") or ())
+        return size * 2
+
+
+class RenderedPost:
+    """A parsed and rendered summary. Shared between requests: treat as read-only.
+
+    ``content`` is the serialized ``{"zh_cn": ...}`` string ready to send;
+    the zh_cn dict is built on first access (previews and batch sends need it).
+    ``parts`` is ``[content]`` when it fits within ``POST_MAX_BYTES``, otherwise
+    the numbered continuation posts to send in order instead.
+    """
+
+    __slots__ = ("title", "date_label", "today_items", "week_items", "content", "parts", "nbytes", "_body", "_zh_cn")
+
+    def __init__(
+        self,
+        title: str,
+        date_label: str,
+        today_items: List[Dict[str, Any]],
+        week_items: List[Dict[str, Any]],
+        body: _PostBody | None = None,
+    ) -> None:
+        self.title = title
+        self.date_label = date_label
+        self.today_items = today_items
+        self.week_items = week_items
+        self._body = body = body or _PostBody(date_label, today_items, week_items)
+        # unsplit form (previews, single-part sends)
+        self.content = _wrap_content(title, [body.joined])
+        if _wire_size(_wrap_content(title, [])) + body.wire_size <= feishu._POST_MAX_BYTES:
+            self.parts = [self.content]
+        else:
+            self.parts = _split_sections(title, body.sections, feishu._POST_MAX_BYTES)
+        self._zh_cn: Dict[str, Any] | None = None
+        self.nbytes = self._estimate_size()
+
+    @property
+    def zh_cn(self) -> Dict[str, Any]:
+        if self._zh_cn is None:
+            self._zh_cn = {"title": self.title, "content": self._body.zh_cn_content}
+        return self._zh_cn
+
+    def _estimate_size(self) -> int:
+        # the body is accounted for in the body cache; items are per mode (MENTIONS keeps "raw")
+        size = 200 + sys.getsizeof(self.content) + (sum(sys.getsizeof(part) for part in self.parts) if len(self.parts) > 1 else 0)
+        size += sum(sys.getsizeof(item.get("raw", "")) + 100 for item in self.today_items + self.week_items)
+        return size
+
+
+def _parse_mention_lines(text: str) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # 简化逻辑：凡是以 '@' 开头的行都视为“今日任务”的条目；其余行忽略
+    items = []
+    for ln in (text or "").splitlines():
+        if ln.lstrip().startswith("@"):
+            ln = ln.strip()
+            user_ids, txt = _parse_task_line_multi(ln)
+            items.append({"user_ids": user_ids, "text": txt, "raw": ln})
+    return "今日", items, []
+
+
+_PARSERS = {SECTIONS: _parse_summary_sections, MENTIONS: _parse_mention_lines}
+
+_BODY_CACHE = _LRUTTLCache(
+    maxsize=RENDER_CACHE_SIZE,
+    ttl=RENDER_CACHE_TTL,
+    maxbytes=RENDER_CACHE_MAX_BYTES,
+    sizeof=lambda body: body.nbytes,
+)
+
+_RENDER_CACHE = _LRUTTLCache(
+    maxsize=RENDER_CACHE_SIZE,
+    ttl=RENDER_CACHE_TTL,
+    maxbytes=RENDER_CACHE_MAX_BYTES,
+    sizeof=lambda post: post.nbytes,
+)
+
+
+def _cache_key(summary: str, title: str, mode: str) -> bytes:
+    digest = hashlib.sha256()
+    for part in (mode, title, "1" if feishu._STRIP_PROJECT else "0", summary):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _body_key(date_label: str, today_items: List[Dict[str, Any]], week_items: List[Dict[str, Any]]) -> bytes:
+    sections = tuple(
+        tuple((tuple(item.get("user_ids") or ()), item.get("text", "")) for item in items)
+        for items in (today_items, week_items)
+    )
+    return hashlib.sha256(repr((feishu._STRIP_PROJECT, date_label, sections)).encode("utf-8")).digest()
+
+
+def render_summary(summary: str, *, title: str, mode: str = SECTIONS) -> RenderedPost:
+    """Parse and render ``summary`` once per (summary, title, STRIP_PROJECT, mode).
+
+    On a miss the rendered task lines are still reused when another title or
+    mode produced the same items; only the title wrapping is redone.
+    """
+    key = _cache_key(summary, title, mode)
+    post = _RENDER_CACHE.get(key)
+    if post is None:
+        date_label, today_items, week_items = _PARSERS[mode](summary)
+        body_key = _body_key(date_label, today_items, week_items)
+        body = _BODY_CACHE.get(body_key)
+        if body is None:
+            body = _PostBody(date_label, today_items, week_items)
+            _BODY_CACHE.set(body_key, body)
+        post = RenderedPost(title, date_label, today_items, week_items, body)
+        _RENDER_CACHE.set(key, post)
+    return post
+
+
+def render_cache_stats() -> Dict[str, Any]:
+    stats = _RENDER_CACHE.stats()
+    stats["bodies"] = _BODY_CACHE.stats()
+    return stats
@@ -0,0 +1,247 @@
+"""Replay a request capture (see recorder.py) and compare latency distributions.
+
+Usage (inside project root, venv activated):
+    python stub_upstream.py --port 9900 &
+    FEISHU_API_BASE=http://127.0.0.1:9900/open-apis PORT=9877 python serve.py &
+    python replay.py run logs/capture.jsonl --target http://127.0.0.1:9877 --speed 10 --out logs/replay-new.jsonl
+    python replay.py compare logs/replay-base.jsonl logs/replay-new.jsonl
+
+``run`` sends every captured request at its original offset divided by
+``--speed`` (``--speed 0`` sends as fast as ``--concurrency`` allows).
+Redacted webhook URLs are pointed at ``--anycross-url`` (the stub by default)
+and status polls are mapped to the job ids created during the replay. One
+JSON line per request is written to ``--out`` and a per-route latency table
+is printed. ``compare`` prints p50/p95/p99 of two such files side by side.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode
+
+import requests
+
+from latency_stats import percentile
+from recorder import REDACTED
+
+
+DEFAULT_ANYCROSS_URL = "http://127.0.0.1:9900/anycross/trigger/callback/replay"
+_STATUS_PATH_RE = re.compile(r"^(/api/task-sync/status/)([^/]+)$")
+
+
+def route_of(method: str, path: str) -> str:
+    match = _STATUS_PATH_RE.match(path)
+    return f"{method} {match.group(1)}<jobId>" if match else f"{method} {path}"
+
+
+def load_capture(path: Path) -> List[Dict[str, Any]]:
+    entries = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    entries.sort(key=lambda e: e.get("ts", 0))
+    return entries
+
+
+def _unredact(value: Any, anycross_url: str) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: anycross_url if v == REDACTED and "webhook" in k.lower() else _unredact(v, anycross_url)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_unredact(v, anycross_url) for v in value]
+    return value
+
+
+class Replayer:
+    def __init__(self, target: str, *, anycross_url: str, timeout: float) -> None:
+        self.target = target.rstrip("/")
+        self.anycross_url = anycross_url
+        self.timeout = timeout
+        self._local = threading.local()
+        self._job_ids: Dict[str, str] = {}  # captured jobId -> replayed jobId
+        self._job_ids_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _path(self, path: str) -> str:
+        match = _STATUS_PATH_RE.match(path)
+        if match:
+            with self._job_ids_lock:
+                return match.group(1) + self._job_ids.get(match.group(2), match.group(2))
+        return path
+
+    def _query(self, query: str) -> str:
+        pairs = parse_qsl(query or "", keep_blank_values=True)
+        return urlencode([(k, self.anycross_url if v == REDACTED and "webhook" in k.lower() else v) for k, v in pairs])
+
+    def send(self, index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        method = entry.get("method", "GET")
+        path = entry.get("path", "/")
+        query = self._query(entry.get("query", ""))
+        url = f"{self.target}{self._path(path)}" + (f"?{query}" if query else "")
+        headers = {"Content-Type": entry["contentType"]} if entry.get("contentType") else {}
+        if method == "OPTIONS":
+            headers["Origin"] = "http://localhost:5173"
+            headers["Access-Control-Request-Method"] = "POST"
+        if "body" in entry:
+            data = json.dumps(_unredact(entry["body"], self.anycross_url), ensure_ascii=False).encode("utf-8")
+        elif "bodyText" in entry:
+            data = entry["bodyText"].encode("utf-8")
+        else:
+            data = None
+
+        out: Dict[str, Any] = {"i": index, "route": route_of(method, path), "originalMs": entry.get("durationMs")}
+        started = time.perf_counter()
+        try:
+            resp = self._session().request(method, url, data=data, headers=headers, timeout=self.timeout, stream=True)
+            body = resp.content  # read streamed (NDJSON) replies to the end
+            out["status"] = resp.status_code
+        except requests.RequestException as exc:
+            out["status"] = None
+            out["error"] = str(exc)
+            body = b""
+        out["latencyMs"] = round((time.perf_counter() - started) * 1000, 2)
+
+        if entry.get("jobId") and b"jobId" in body:
+            try:
+                new_id = json.loads(body).get("jobId")
+            except ValueError:
+                new_id = None
+            if new_id:
+                with self._job_ids_lock:
+                    self._job_ids[entry["jobId"]] = new_id
+        return out
+
+    def run(self, entries: List[Dict[str, Any]], *, speed: float, concurrency: int) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        if not entries:
+            return results
+        t0 = entries[0].get("ts", 0)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = []
+            for index, entry in enumerate(entries):
+                if entry.get("bodyTruncated"):
+                    results.append({"i": index, "route": route_of(entry.get("method", ""), entry.get("path", "")), "skipped": "body not captured"})
+                    continue
+                if speed > 0:
+                    delay = (entry.get("ts", t0) - t0) / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(pool.submit(self.send, index, entry))
+            results.extend(f.result() for f in futures)
+        results.sort(key=lambda r: r["i"])
+        return results
+
+
+def latency_table(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        if "latencyMs" in r:
+            by_route.setdefault(r["route"], []).append(r)
+    table = {}
+    for route, rows in sorted(by_route.items()):
+        latencies = [r["latencyMs"] for r in rows]
+        table[route] = {
+            "count": len(rows),
+            "errors": sum(1 for r in rows if r.get("status") is None or r["status"] >= 500),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies),
+        }
+    return table
+
+
+def print_table(table: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'route':<40}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for route, row in table.items():
+        print(
+            f"{route:<40}{row['count']:>7}{row['errors']:>8}"
+            f"{row['p50']:>10.1f}{row['p95']:>10.1f}{row['p99']:>10.1f}{row['max']:>10.1f}"
+        )
+
+
+def _read_results(path: Path) -> List[Dict[str, Any]]:
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    entries = load_capture(Path(args.capture))
+    if args.limit:
+        entries = entries[: args.limit]
+    print(f"replaying {len(entries)} request(s) against {args.target} (speed={args.speed or 'max'}, concurrency={args.concurrency})")
+    replayer = Replayer(args.target, anycross_url=args.anycross_url, timeout=args.timeout)
+    started = time.monotonic()
+    results = replayer.run(entries, speed=args.speed, concurrency=args.concurrency)
+    elapsed = time.monotonic() - started
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as fh:
+            for r in results:
+                fh.write(json.dumps(r, ensure_ascii=False) + "\n")
+    skipped = sum(1 for r in results if "skipped" in r)
+    print(f"done in {elapsed:.1f}s ({skipped} skipped)")
+    print_table(latency_table(results))
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    base = latency_table(_read_results(Path(args.base)))
+    new = latency_table(_read_results(Path(args.new)))
+    print(f"{'route':<40}{'pct':>5}{'base ms':>10}{'new ms':>10}{'change':>9}")
+    for route in sorted(set(base) | set(new)):
+        b, n = base.get(route), new.get(route)
+        if b is None or n is None:
+            print(f"{route:<40}  only in {'new' if b is None else 'base'}")
+            continue
+        for pct in ("p50", "p95", "p99"):
+            change = (n[pct] - b[pct]) / b[pct] if b[pct] else 0.0
+            print(f"{route if pct == 'p50' else '':<40}{pct:>5}{b[pct]:>10.1f}{n[pct]:>10.1f}{change:>+9.0%}")
+        if b["errors"] or n["errors"]:
+            print(f"{'':<40}{'err':>5}{b['errors']:>10}{n['errors']:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="replay a capture against a running instance")
+    run.add_argument("capture")
+    run.add_argument("--target", default="http://127.0.0.1:9877")
+    run.add_argument("--speed", type=float, default=1.0, help="pacing factor; 1 = original, 0 = no pacing")
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--anycross-url", default=DEFAULT_ANYCROSS_URL)
+    run.add_argument("--timeout", type=float, default=120)
+    run.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    run.add_argument("--out", help="write per-request results (JSONL) here")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="compare two `run --out` files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Priority scheduler with fair round-robin lanes, used for outbound task-sync calls."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List
+
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+class _Task:
+    __slots__ = ("fn", "args", "kwargs", "future", "enqueued_at")
+
+    def __init__(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class _WaitStats:
+    """Queue-wait statistics for one priority class (totals plus a recent window)."""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int = 1000) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        if wait > self.max:
+            self.max = wait
+        self.recent.append(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def pct(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "avgMs": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "maxMs": round(self.max * 1000, 1),
+            "p50Ms": pct(0.50),
+            "p95Ms": pct(0.95),
+        }
+
+
+class FairScheduler:
+    """Run callables on a fixed set of worker threads, by priority class.
+
+    * ``interactive`` tasks are preferred, but after ``interactive_weight``
+      consecutive interactive picks a waiting ``bulk`` task gets a turn.
+    * ``reserved_interactive`` slots never run bulk tasks, so a click is
+      not stuck behind long bulk calls.
+    * Within a class, tasks sit in lanes (one per job / webhook URL) that are
+      served round-robin, one task per turn.
+    * A task whose callable returns a ``concurrent.futures.Future`` (e.g. a
+      coroutine handed to the outbound engine) frees its worker thread at once
+      but keeps its slot until that future completes. ``max_inflight`` (default:
+      ``workers``) bounds such running tasks, so a few dispatcher threads can
+      keep many slow upstream calls in flight.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        reserved_interactive: int = 1,
+        interactive_weight: int = 4,
+        max_inflight: int | None = None,
+        name: str = "scheduler",
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_inflight = max(1, max_inflight or self.workers)
+        self.reserved_interactive = min(max(0, reserved_interactive), self.max_inflight - 1)
+        self.interactive_weight = max(1, interactive_weight)
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, "OrderedDict[Hashable, Deque[_Task]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._queued = {p: 0 for p in PRIORITIES}
+        self._running = {p: 0 for p in PRIORITIES}
+        self._waits = {p: _WaitStats() for p in PRIORITIES}
+        self._streak = 0
+        self._finished: Deque[float] = deque(maxlen=10_000)  # completion times, for throughput
+        self._threads: List[threading.Thread] = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, priority: str, lane: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        if priority not in self._lanes:
+            raise ValueError(f"unknown priority {priority!r}")
+        task = _Task(fn, args, kwargs)
+        with self._cond:
+            lanes = self._lanes[priority]
+            queue = lanes.get(lane)
+            if queue is None:
+                queue = lanes[lane] = deque()
+            queue.append(task)
+            self._queued[priority] += 1
+            self._cond.notify()
+        return task.future
+
+    def _pick(self) -> tuple[str, _Task] | None:
+        if self._running[INTERACTIVE] + self._running[BULK] >= self.max_inflight:
+            return None
+        interactive_ready = self._queued[INTERACTIVE] > 0
+        bulk_ready = self._queued[BULK] > 0 and self._running[BULK] < self.max_inflight - self.reserved_interactive
+        if interactive_ready and bulk_ready:
+            if self._streak >= self.interactive_weight:
+                priority, self._streak = BULK, 0
+            else:
+                priority, self._streak = INTERACTIVE, self._streak + 1
+        elif interactive_ready:
+            priority, self._streak = INTERACTIVE, 0
+        elif bulk_ready:
+            priority, self._streak = BULK, 0
+        else:
+            return None
+
+        lanes = self._lanes[priority]
+        lane, queue = next(iter(lanes.items()))
+        task = queue.popleft()
+        if queue:
+            lanes.move_to_end(lane)  # next turn goes to the following lane
+        else:
+            del lanes[lane]
+        self._queued[priority] -= 1
+        return priority, task
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                picked = self._pick()
+                while picked is None:
+                    self._cond.wait()
+                    picked = self._pick()
+                priority, task = picked
+                self._running[priority] += 1
+                self._waits[priority].add(time.monotonic() - task.enqueued_at)
+            handed_off = False
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        result = task.fn(*task.args, **task.kwargs)
+                    except BaseException as exc:  # noqa: BLE001
+                        task.future.set_exception(exc)
+                    else:
+                        if isinstance(result, Future):
+                            # the slot stays taken until the handed-off call completes
+                            handed_off = True
+                            result.add_done_callback(lambda done, task=task, priority=priority: self._resolve(task, priority, done))
+                        else:
+                            task.future.set_result(result)
+            finally:
+                if not handed_off:
+                    self._release(priority)
+
+    def _resolve(self, task: _Task, priority: str, done: Future) -> None:
+        try:
+            if done.cancelled():
+                task.future.cancel()
+            elif done.exception() is not None:
+                task.future.set_exception(done.exception())
+            else:
+                task.future.set_result(done.result())
+        finally:
+            self._release(priority)
+
+    def _release(self, priority: str) -> None:
+        with self._cond:
+            self._running[priority] -= 1
+            self._finished.append(time.monotonic())
+            # a freed slot may unblock a waiting task
+            self._cond.notify()
+
+    def backlog(self) -> int:
+        """Tasks queued or running, all classes."""
+        with self._cond:
+            return sum(self._queued.values()) + sum(self._running.values())
+
+    def throughput(self, window: float = 60.0) -> float:
+        """Tasks completed per second over (at most) the last ``window`` seconds.
+
+        The rate is taken over the span actually covered by completions, so a
+        burst shortly after start-up is not diluted by an empty window.
+        """
+        now = time.monotonic()
+        cutoff = now - window
+        recent, oldest = 0, now
+        with self._cond:
+            for finished_at in reversed(self._finished):
+                if finished_at < cutoff:
+                    break
+                recent += 1
+                oldest = finished_at
+        return recent / max(1.0, now - oldest) if recent else 0.0
+
+    def metrics(self) -> Dict[str, Any]:
+        throughput = self.throughput()
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "maxInFlight": self.max_inflight,
+                "reservedInteractive": self.reserved_interactive,
+                "interactiveWeight": self.interactive_weight,
+                "throughputPerSec": round(throughput, 2),
+                "classes": {
+                    p: {
+                        "queued": self._queued[p],
+                        "running": self._running[p],
+                        "lanes": len(self._lanes[p]),
+                        "queueWait": self._waits[p].snapshot(),
+                    }
+                    for p in PRIORITIES
+                },
+            }
+
+    def status(self) -> Dict[str, Any]:
+        alive = sum(1 for thread in self._threads if thread.is_alive())
+        return {"ok": alive == self.workers, "threads": alive, "maxThreads": self.workers}
@@ -1,7 +1,11 @@
+import os
+
 from waitress import serve
 from app import app
 
 if __name__ == "__main__":
     # Bind to loopback so the app is only reachable via Nginx (HTTPS)
     # Increase threads to improve tolerance to slow upstream calls
-    serve(app, host="127.0.0.1", port=9876, threads=16)
+    # PORT lets a second instance run side by side (e.g. for replay comparisons)
+    # SERVE_THREADS also sizes the task-sync admission defaults (see task_sync_service.py)
+    serve(app, host="127.0.0.1", port=int(os.getenv("PORT", "9876")), threads=int(os.getenv("SERVE_THREADS", "16")))
@@ -0,0 +1,155 @@
+"""Stub Feishu open API + Anycross webhook server for replay and load tests.
+
+Usage (inside project root, venv activated):
+    python stub_upstream.py --port 9900 --feishu-latency-ms 40 --anycross-latency-ms 800
+
+Then start the app against it:
+    FEISHU_API_BASE=http://127.0.0.1:9900/open-apis PORT=9877 python serve.py
+
+and point task-sync requests at ``http://127.0.0.1:9900/anycross/trigger/callback/<anything>``
+(``replay.py run`` does this automatically). Every endpoint answers with a
+minimal success body after the configured latency (+/- jitter); nothing is
+stored.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+_ids = itertools.count(1)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _sleep(self, latency_ms: float) -> None:
+        jitter = self.server.jitter
+        delay = latency_ms * (1 + random.uniform(-jitter, jitter)) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _route(self, method: str, body: bytes = b"") -> Tuple[int, Dict[str, Any], float]:
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        feishu_ms = self.server.feishu_latency_ms
+
+        if path.startswith("/anycross/"):
+            if random.random() < self.server.error_rate:
+                return 500, {"code": 500, "msg": "stub error"}, self.server.anycross_latency_ms
+            return 200, {"code": 0, "msg": "success", "data": {"status": "done"}}, self.server.anycross_latency_ms
+        if path == "/open-apis/auth/v3/tenant_access_token/internal":
+            # one token per app_id, so multi-app setups can be told apart in the Authorization header
+            try:
+                app_id = json.loads(body or b"{}").get("app_id") or "stub"
+            except ValueError:
+                app_id = "stub"
+            return 200, {"code": 0, "msg": "ok", "tenant_access_token": f"t-{app_id}", "expire": 7200}, feishu_ms
+        if random.random() < self.server.error_rate:
+            return 200, {"code": 99991400, "msg": "stub rate limited"}, feishu_ms
+        if path == "/open-apis/im/v1/messages" and method == "POST":
+            return 200, {"code": 0, "msg": "success", "data": {"message_id": f"om_stub_{next(_ids)}"}}, feishu_ms
+        if path.startswith("/open-apis/im/v1/messages/") and method in ("PUT", "PATCH"):
+            message_id = path.rsplit("/", 1)[-1]
+            return 200, {"code": 0, "msg": "success", "data": {"message_id": message_id}}, feishu_ms
+        if path == "/open-apis/message/v4/batch_send":
+            return 200, {"code": 0, "msg": "ok", "data": {"message_id": f"bm_stub_{next(_ids)}", "invalid_open_ids": []}}, feishu_ms
+        if path == "/open-apis/contact/v3/users/batch" and method == "GET":
+            ids = parse_qs(url.query).get("user_ids", [])
+            items = [{"open_id": uid, "name": f"用户{uid[-4:]}"} for uid in ids]
+            return 200, {"code": 0, "msg": "success", "data": {"items": items}}, feishu_ms
+        return 404, {"code": 404, "msg": f"stub has no route for {method} {url.path}"}, 0
+
+    def _handle(self, method: str) -> None:
+        status, body, latency_ms = self._route(method, self._read_body())
+        self._sleep(latency_ms)
+        self._reply(status, body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._handle("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._handle("POST")
+
+    def do_PUT(self) -> None:  # noqa: N802
+        self._handle("PUT")
+
+    def do_PATCH(self) -> None:  # noqa: N802
+        self._handle("PATCH")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        *,
+        feishu_latency_ms: float = 40,
+        anycross_latency_ms: float = 800,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, StubHandler)
+        self.feishu_latency_ms = feishu_latency_ms
+        self.anycross_latency_ms = anycross_latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.verbose = verbose
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9900)
+    parser.add_argument("--feishu-latency-ms", type=float, default=40)
+    parser.add_argument("--anycross-latency-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter, e.g. 0.2 = +/-20%%")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port),
+        feishu_latency_ms=args.feishu_latency_ms,
+        anycross_latency_ms=args.anycross_latency_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        verbose=args.verbose,
+    )
+    print(f"stub upstream on http://{args.host}:{args.port} (Feishu base: http://{args.host}:{args.port}/open-apis)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+import json
 import logging
+import re
+import ssl
+import tempfile
 import threading
 import time
 import uuid
-from typing import Any, Dict, List, Tuple
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
 
-import requests
+import httpx
 import os
 
+from outbound import ENGINE
+from scheduler import BULK, INTERACTIVE, PRIORITIES, FairScheduler
+
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +37,21 @@ DEFAULT_PAYLOAD_TEMPLATE: Dict[str, Any] = {
 }
 
 
+# Declarative field schema for Anycross payloads (field -> kind); compiled
+# once into normalizer functions by _compile_schema below.
+PAYLOAD_SCHEMA: Dict[str, str] = {
+    "操作": "required_text",
+    "任务表行": "required_text",
+    "任务名称": "text",
+    "任务备注": "text",
+    "执行者": "members",
+    "任务截止时间": "datetime",
+    "任务状态": "text",
+    "任务关注者": "members",
+    "任务评论": "text",
+}
+
+
 class AnycrossTriggerError(RuntimeError):
     """Raised when the Anycross webhook cannot be invoked successfully."""
 
@@ -34,6 +60,14 @@ class AnycrossInvokeTimeout(AnycrossTriggerError):
     """Special case: Anycross accepted the request but timed out before replying."""
 
 
+class TaskSyncOverloaded(RuntimeError):
+    """Raised when admitting more work would exceed a configured limit."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def trigger_anycross_webhook(
     webhook_url: str,
     payload: Dict[str, Any],
@@ -41,33 +75,48 @@ def trigger_anycross_webhook(
     timeout: int = 15,
 ) -> Tuple[int, Any]:
     """POST payload to the given Anycross webhook URL and return (status, body)."""
+    return ENGINE.run(trigger_anycross_webhook_async(webhook_url, payload, timeout=timeout))
+
+
+@lru_cache(maxsize=None)
+def _ca_context(ca_bundle: str) -> ssl.SSLContext:
+    return ssl.create_default_context(cafile=ca_bundle)
 
-    if not webhook_url:
-        raise AnycrossTriggerError("webhook_url is required")
 
+def _anycross_client() -> httpx.AsyncClient:
     # SSL verification behavior can be controlled via env:
     # - ANYCROSS_CA_BUNDLE: path to a PEM bundle (used as verify argument)
     # - ANYCROSS_VERIFY_SSL: set to "false"/"0"/"no" to disable verification (DEV only)
-    verify_opt: bool | str = True
+    # One pooled client per setting, so connections are reused across calls.
     ca_bundle = os.getenv("ANYCROSS_CA_BUNDLE")
     if ca_bundle:
-        verify_opt = ca_bundle
-    else:
-        verify_flag = (os.getenv("ANYCROSS_VERIFY_SSL", "true").strip().lower())
-        if verify_flag in ("0", "false", "no"):
-            verify_opt = False
+        return ENGINE.client(("anycross", ca_bundle), verify=_ca_context(ca_bundle))
+    verify_flag = (os.getenv("ANYCROSS_VERIFY_SSL", "true").strip().lower())
+    verify_opt = verify_flag not in ("0", "false", "no")
+    return ENGINE.client(("anycross", verify_opt), verify=verify_opt)
+
+
+async def trigger_anycross_webhook_async(
+    webhook_url: str,
+    payload: Dict[str, Any],
+    *,
+    timeout: int = 15,
+) -> Tuple[int, Any]:
+    """Coroutine form of :func:`trigger_anycross_webhook`; await it on the outbound engine loop."""
+
+    if not webhook_url:
+        raise AnycrossTriggerError("webhook_url is required")
 
     try:
-        response = requests.post(
+        response = await _anycross_client().post(
             webhook_url,
             json=payload,
             timeout=timeout,
-            verify=verify_opt,
         )
-    except requests.exceptions.ReadTimeout as exc:
+    except httpx.ReadTimeout as exc:
         # Upstream未在超时内返回，视为已接受（异步执行中），交由轮询确认最终状态
         raise AnycrossInvokeTimeout(f"Read timeout after {timeout}s") from exc
-    except requests.RequestException as exc:  # network or SSL failure
+    except httpx.HTTPError as exc:  # network or SSL failure
         raise AnycrossTriggerError(f"Network error: {exc}") from exc
 
     body: Any
@@ -90,8 +139,292 @@ def trigger_anycross_webhook(
 
 # ---- Batch job utilities -------------------------------------------------
 
-_jobs: Dict[str, Dict[str, Any]] = {}
+# Result status codes; names are only materialized at the API boundary.
+_SUCCESS, _ACCEPTED, _ERROR = 0, 1, 2
+_STATUS_NAMES = ("success", "accepted", "error")
+
+_FINAL_STATUSES = frozenset({"success", "error", "partial", "accepted"})
+
+
+def _overall_status(success_count: int, accepted_count: int, error_count: int) -> str:
+    total = success_count + accepted_count + error_count
+    if error_count == 0 and accepted_count == 0:
+        return "success"
+    if success_count == 0 and accepted_count == 0:
+        return "error"
+    if success_count == total:
+        return "success"
+    if success_count == 0 and error_count == 0:
+        return "accepted"
+    return "partial"
+
+
+class RecordResult:
+    """Outcome of one record sync, stored compactly; see :meth:`to_dict` for the API shape."""
+
+    __slots__ = ("index", "record_id", "code", "http", "body", "message", "detail", "errors")
+
+    def __init__(
+        self,
+        record_id: str | None,
+        code: int,
+        *,
+        http: int | None = None,
+        body: Any = None,
+        message: str | None = None,
+        detail: str | None = None,
+        errors: Dict[str, str] | None = None,
+    ) -> None:
+        self.index: int | None = None
+        self.record_id = record_id
+        self.code = code
+        self.http = http
+        self.body = body
+        self.message = message
+        self.detail = detail
+        self.errors = errors
+
+    @property
+    def status(self) -> str:
+        return _STATUS_NAMES[self.code]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"recordId": self.record_id, "status": _STATUS_NAMES[self.code]}
+        if self.code == _SUCCESS:
+            data["http"] = self.http
+            data["body"] = self.body
+        else:
+            data["message"] = self.message
+            if self.detail is not None:
+                data["detail"] = self.detail
+            if self.errors is not None:
+                data["errors"] = self.errors
+        if self.index is not None:
+            data["index"] = self.index
+        return data
+
+
+class BatchJob:
+    """A batch job's state. Counters are maintained as results arrive so summaries are O(1).
+
+    ``version`` increases on every change and backs the status endpoint's ETag.
+    """
+
+    __slots__ = (
+        "job_id",
+        "priority",
+        "status",
+        "version",
+        "results",
+        "counts",
+        "created_at",
+        "updated_at",
+        "completed_at",
+    )
+
+    def __init__(self, job_id: str, priority: str = BULK) -> None:
+        self.job_id = job_id
+        self.priority = priority
+        self.status = "pending"
+        self.version = 0
+        self.results: List[RecordResult] = []
+        self.counts = [0, 0, 0]  # indexed by result code
+        self.created_at = time.time()
+        self.updated_at: float | None = None
+        self.completed_at: float | None = None
+
+    def add_result(self, result: RecordResult) -> None:
+        self.results.append(result)
+        self.counts[result.code] += 1
+        self.status = "running"
+        self.version += 1
+        self.updated_at = time.time()
+
+    def finish(self) -> str:
+        self.status = _overall_status(*self.counts)
+        self.version += 1
+        self.completed_at = time.time()
+        return self.status
+
+    def summary(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "status": self.status,
+            "priority": self.priority,
+            "total": len(self.results),
+            "success": self.counts[_SUCCESS],
+            "accepted": self.counts[_ACCEPTED],
+            "error": self.counts[_ERROR],
+            "createdAt": self.created_at,
+        }
+        if self.updated_at is not None:
+            data["updatedAt"] = self.updated_at
+        if self.completed_at is not None:
+            data["completedAt"] = self.completed_at
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        # results are stored in completion order (streaming reads them that
+        # way); polls list them in input order
+        data = self.summary()
+        data["results"] = [result.to_dict() for result in sorted(self.results, key=_result_index)]
+        return data
+
+
+def _result_index(result: RecordResult) -> int:
+    return result.index if result.index is not None else -1
+
+
+_jobs: Dict[str, BatchJob] = {}
 _jobs_lock = threading.Lock()
+# Notified whenever a job records a result or finishes (used by result streaming).
+_jobs_changed = threading.Condition(_jobs_lock)
+
+# Shared scheduler running individual record syncs for single calls and batch
+# jobs. Each job keeps at most TASK_SYNC_JOB_CONCURRENCY of its records queued
+# or in flight; TASK_SYNC_INTERACTIVE_RESERVED slots only run interactive work.
+# TASK_SYNC_WORKERS threads only start calls: the webhook requests themselves
+# run on the outbound engine, at most TASK_SYNC_MAX_INFLIGHT at a time.
+_WORKER_COUNT = int(os.getenv("TASK_SYNC_WORKERS", "4"))
+_MAX_INFLIGHT = int(os.getenv("TASK_SYNC_MAX_INFLIGHT", "256"))
+_JOB_CONCURRENCY = max(1, int(os.getenv("TASK_SYNC_JOB_CONCURRENCY", "4")))
+_INTERACTIVE_RESERVED = int(os.getenv("TASK_SYNC_INTERACTIVE_RESERVED", "2"))
+_INTERACTIVE_WEIGHT = int(os.getenv("TASK_SYNC_INTERACTIVE_WEIGHT", "4"))
+# Batches up to this many records default to the interactive class.
+_INTERACTIVE_MAX_RECORDS = int(os.getenv("TASK_SYNC_INTERACTIVE_MAX_RECORDS", "1"))
+_scheduler = FairScheduler(
+    _WORKER_COUNT,
+    reserved_interactive=_INTERACTIVE_RESERVED,
+    interactive_weight=_INTERACTIVE_WEIGHT,
+    max_inflight=_MAX_INFLIGHT,
+    name="task-sync",
+)
+
+
+def worker_pool_status() -> Dict[str, Any]:
+    """Liveness of the shared scheduler, for the health check."""
+    status = _scheduler.status()
+    with _jobs_lock:
+        status["activeJobs"] = _active_jobs
+    return status
+
+
+def scheduler_metrics() -> Dict[str, Any]:
+    """Per-class queue depth, running count and queue-wait statistics, plus admission state."""
+    data = _scheduler.metrics()
+    data["admission"] = admission_status()
+    return data
+
+
+# Admission limits (0 disables a limit). Past them, new work is refused with
+# TaskSyncOverloaded instead of piling up threads and queued records.
+# Single calls and streaming requests hold a server thread until they finish;
+# each limit defaults to a quarter of the waitress threads (SERVE_THREADS, see
+# serve.py), so /healthz, job polls and 429s always have threads left.
+_SERVER_THREADS = int(os.getenv("SERVE_THREADS", "16"))
+_THREAD_SHARE = str(max(1, _SERVER_THREADS // 4))
+_MAX_INFLIGHT_SINGLES = int(os.getenv("TASK_SYNC_MAX_INFLIGHT_SINGLES", _THREAD_SHARE))
+_MAX_STREAMS = int(os.getenv("TASK_SYNC_MAX_STREAMS", _THREAD_SHARE))
+_MAX_QUEUED_RECORDS = int(os.getenv("TASK_SYNC_MAX_QUEUED_RECORDS", "5000"))
+_MAX_ACTIVE_JOBS = int(os.getenv("TASK_SYNC_MAX_ACTIVE_JOBS", "32"))
+# Retry-After bounds (seconds); the fallback is used before any throughput is known.
+_RETRY_AFTER_MIN = 1
+_RETRY_AFTER_MAX = int(os.getenv("TASK_SYNC_RETRY_AFTER_MAX", "300"))
+_RETRY_AFTER_FALLBACK = int(os.getenv("TASK_SYNC_RETRY_AFTER_FALLBACK", "10"))
+
+# Guarded by _jobs_lock.
+_inflight_singles = 0
+_open_streams = 0  # NDJSON uploads being read + stream=true responses
+_pending_records = 0  # validated batch records not yet finished
+_active_jobs = 0
+
+
+def _retry_after(excess: int) -> int:
+    """Seconds until roughly ``excess`` more records' worth of capacity frees up."""
+    rate = _scheduler.throughput()
+    if rate <= 0:
+        return _RETRY_AFTER_FALLBACK
+    seconds = (_scheduler.backlog() + excess) / rate if excess > 0 else 1
+    return int(min(_RETRY_AFTER_MAX, max(_RETRY_AFTER_MIN, seconds + 0.999)))
+
+
+def _admit_job(records: int | None) -> None:
+    """Reserve an active-job slot for a batch of ``records`` (None: streamed, size unknown)."""
+    global _active_jobs
+    with _jobs_lock:
+        if _MAX_ACTIVE_JOBS and _active_jobs >= _MAX_ACTIVE_JOBS:
+            reason, excess = f"too many active jobs (limit {_MAX_ACTIVE_JOBS})", _pending_records // max(1, _active_jobs)
+        elif _MAX_QUEUED_RECORDS and _pending_records and _pending_records + (records or 1) > _MAX_QUEUED_RECORDS:
+            # an oversized batch is still admitted when nothing else is queued
+            reason, excess = f"too many queued records (limit {_MAX_QUEUED_RECORDS})", _pending_records + (records or 1) - _MAX_QUEUED_RECORDS
+        else:
+            _active_jobs += 1
+            return
+    retry_after = _retry_after(excess)
+    logger.warning("Rejecting batch job: %s, retry after %ds", reason, retry_after)
+    raise TaskSyncOverloaded(reason, retry_after)
+
+
+def admit_stream() -> None:
+    """Reserve a slot for a request that holds its thread while streaming (NDJSON upload, stream=true).
+
+    Raises TaskSyncOverloaded when TASK_SYNC_MAX_STREAMS are already open;
+    every successful call must be paired with :func:`release_stream`.
+    """
+    global _open_streams
+    with _jobs_lock:
+        admitted = not _MAX_STREAMS or _open_streams < _MAX_STREAMS
+        if admitted:
+            _open_streams += 1
+    if not admitted:
+        retry_after = _retry_after(1)
+        logger.warning("Rejecting streaming task-sync request: %d open, retry after %ds", _MAX_STREAMS, retry_after)
+        raise TaskSyncOverloaded(f"too many streaming requests (limit {_MAX_STREAMS})", retry_after)
+
+
+def release_stream() -> None:
+    global _open_streams
+    with _jobs_lock:
+        _open_streams -= 1
+
+
+def _release_job() -> None:
+    global _active_jobs
+    with _jobs_lock:
+        _active_jobs -= 1
+
+
+def _track_pending(delta: int) -> None:
+    global _pending_records
+    with _jobs_lock:
+        _pending_records += delta
+
+
+def _admit_queued_record() -> None:
+    """Count one more queued record of a streamed upload, within TASK_SYNC_MAX_QUEUED_RECORDS."""
+    global _pending_records
+    with _jobs_lock:
+        if not _MAX_QUEUED_RECORDS or _pending_records < _MAX_QUEUED_RECORDS:
+            _pending_records += 1
+            return
+    retry_after = _retry_after(1)
+    logger.warning("Stopping streamed upload: %d records queued, retry after %ds", _MAX_QUEUED_RECORDS, retry_after)
+    raise TaskSyncOverloaded(f"too many queued records (limit {_MAX_QUEUED_RECORDS})", retry_after)
+
+
+def admission_status() -> Dict[str, Any]:
+    with _jobs_lock:
+        return {
+            "inflightSingles": _inflight_singles,
+            "openStreams": _open_streams,
+            "pendingRecords": _pending_records,
+            "activeJobs": _active_jobs,
+            "limits": {
+                "inflightSingles": _MAX_INFLIGHT_SINGLES,
+                "streams": _MAX_STREAMS,
+                "queuedRecords": _MAX_QUEUED_RECORDS,
+                "activeJobs": _MAX_ACTIVE_JOBS,
+            },
+        }
 
 
 def _normalize_record_entry(entry: Any) -> Tuple[str | None, Dict[str, Any] | None, str | None]:
@@ -119,6 +452,102 @@ def _normalize_record_entry(entry: Any) -> Tuple[str | None, Dict[str, Any] | No
     return None, None, "Invalid record entry"
 
 
+# ---- Payload validation --------------------------------------------------
+
+# Normalizers take a raw value and return (normalized_value, error_message).
+_MEMBER_ID_TYPES = frozenset({"open_id", "union_id", "user_id"})
+_DATETIME_RE = re.compile(
+    r"^\s*(\d{4})[/-](\d{1,2})[/-](\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::\d{2})?)?\s*$"
+)
+
+
+def _normalize_text(value: Any) -> Tuple[Any, str | None]:
+    if value is None:
+        return "", None
+    if not isinstance(value, str):
+        return value, "must be a string"
+    return value, None
+
+
+def _normalize_required_text(value: Any) -> Tuple[Any, str | None]:
+    if not isinstance(value, str) or not value.strip():
+        return value, "must be a non-empty string"
+    return value.strip(), None
+
+
+def _normalize_member(item: Any) -> Tuple[Any, str | None]:
+    if isinstance(item, str) and item.strip().startswith("ou_"):
+        return {"id": item.strip(), "type": "open_id"}, None
+    if isinstance(item, dict):
+        member_id = item.get("id")
+        member_type = item.get("type", "open_id")
+        if isinstance(member_id, str) and member_id.strip() and isinstance(member_type, str) and member_type in _MEMBER_ID_TYPES:
+            # extra keys (name, email, ...) are dropped
+            return {"id": member_id.strip(), "type": member_type}, None
+    return item, "must be {id, type} with type in open_id/union_id/user_id"
+
+
+def _normalize_members(value: Any) -> Tuple[Any, str | None]:
+    if value is None or value == "":
+        return [], None
+    if isinstance(value, (str, dict)):
+        value = [value]
+    if not isinstance(value, list):
+        return value, "must be a list of {id, type}"
+    members = []
+    for idx, item in enumerate(value):
+        member, error = _normalize_member(item)
+        if error:
+            return value, f"item {idx} {error}"
+        members.append(member)
+    return members, None
+
+
+def _normalize_datetime(value: Any) -> Tuple[Any, str | None]:
+    if value is None or value == "":
+        return "", None
+    match = _DATETIME_RE.match(value) if isinstance(value, str) else None
+    if not match:
+        return value, "must be 'YYYY/MM/DD HH:MM'"
+    year, month, day, hour, minute = (int(part) if part else 0 for part in match.groups())
+    try:
+        parsed = datetime(year, month, day, hour, minute)
+    except ValueError as exc:
+        return value, f"invalid date: {exc}"
+    return parsed.strftime("%Y/%m/%d %H:%M"), None
+
+
+_NORMALIZERS: Dict[str, Callable[[Any], Tuple[Any, str | None]]] = {
+    "text": _normalize_text,
+    "required_text": _normalize_required_text,
+    "members": _normalize_members,
+    "datetime": _normalize_datetime,
+}
+
+
+def _compile_schema(schema: Dict[str, str]) -> Dict[str, Callable[[Any], Tuple[Any, str | None]]]:
+    return {field: _NORMALIZERS[kind] for field, kind in schema.items()}
+
+
+_FIELD_NORMALIZERS = _compile_schema(PAYLOAD_SCHEMA)
+
+
+def validate_payload(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Normalize a full payload against PAYLOAD_SCHEMA; returns (payload, field_errors)."""
+    normalized: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for field, value in payload.items():
+        normalizer = _FIELD_NORMALIZERS.get(field)
+        if normalizer is None:
+            errors[field] = "unknown field"
+            continue
+        normalized_value, error = normalizer(value)
+        if error:
+            errors[field] = error
+        normalized[field] = normalized_value
+    return normalized, errors
+
+
 def _assemble_payload(record_id: str, payload: Dict[str, Any] | None) -> Dict[str, Any]:
     final_payload: Dict[str, Any] = dict(DEFAULT_PAYLOAD_TEMPLATE)
     final_payload["任务表行"] = record_id
@@ -140,21 +569,48 @@ def _assemble_payload(record_id: str, payload: Dict[str, Any] | None) -> Dict[st
     return final_payload
 
 
-def process_single_record(
+def _prepare_record(entry: Any) -> Tuple[str | None, Dict[str, Any] | None, RecordResult | None]:
+    """Validate a record entry without any I/O.
+
+    Returns (record_id, payload, None) for a clean record, or
+    (record_id, None, rejected_result) when it must not be sent upstream.
+    """
+    record_id, payload, error = _normalize_record_entry(entry)
+    if error:
+        return None, None, RecordResult(None, _ERROR, message=error)
+
+    final_payload, field_errors = validate_payload(_assemble_payload(record_id, payload))
+    if field_errors:
+        return record_id, None, RecordResult(
+            record_id,
+            _ERROR,
+            message="payload validation failed",
+            errors=field_errors,
+        )
+    return record_id, final_payload, None
+
+
+def _start_record(
     webhook_url: str,
-    record_entry: Any,
+    record_id: str,
+    final_payload: Dict[str, Any],
     *,
     timeout: int = 70,
-) -> Dict[str, Any]:
-    record_id, payload, error = _normalize_record_entry(record_entry)
-    if error:
-        return {"recordId": None, "status": "error", "message": error}
+) -> Future:
+    """Scheduler task: hand the upstream call to the outbound engine and return at once."""
+    return ENGINE.submit(_dispatch_record_async(webhook_url, record_id, final_payload, timeout=timeout))
 
-    final_payload = _assemble_payload(record_id, payload)
 
+async def _dispatch_record_async(
+    webhook_url: str,
+    record_id: str,
+    final_payload: Dict[str, Any],
+    *,
+    timeout: int = 70,
+) -> RecordResult:
     try:
         logger.info("Triggering Anycross webhook for record %s", record_id)
-        http_status, body = trigger_anycross_webhook(
+        http_status, body = await trigger_anycross_webhook_async(
             webhook_url,
             final_payload,
             timeout=timeout,
@@ -165,117 +621,269 @@ def process_single_record(
             http_status,
             body,
         )
-        return {
-            "recordId": record_id,
-            "status": "success",
-            "http": http_status,
-            "body": body,
-        }
+        return RecordResult(record_id, _SUCCESS, http=http_status, body=body)
     except AnycrossInvokeTimeout as exc:
         logger.warning(
             "Anycross invoke timeout for %s: %s",
             record_id,
             exc,
         )
-        return {
-            "recordId": record_id,
-            "status": "accepted",
-            "message": "Anycross flow still running (invoke timeout)",
-            "detail": str(exc),
-        }
+        return RecordResult(
+            record_id,
+            _ACCEPTED,
+            message="Anycross flow still running (invoke timeout)",
+            detail=str(exc),
+        )
     except AnycrossTriggerError as exc:
         logger.error(
             "Anycross trigger failed for %s: %s",
             record_id,
             exc,
         )
-        return {
-            "recordId": record_id,
-            "status": "error",
-            "message": str(exc),
-        }
+        return RecordResult(record_id, _ERROR, message=str(exc))
 
 
-def enqueue_batch_job(
+def process_single_record(
     webhook_url: str,
-    records: List[Any],
+    record_entry: Any,
     *,
     timeout: int = 70,
-) -> str:
-    job_id = uuid.uuid4().hex
-    job_data = {
-        "status": "pending",
-        "results": [],
-        "createdAt": time.time(),
-    }
+    priority: str = INTERACTIVE,
+) -> Dict[str, Any]:
+    """Validate inline, then run the upstream call on the scheduler and wait for it.
+
+    Raises TaskSyncOverloaded when TASK_SYNC_MAX_INFLIGHT_SINGLES calls are
+    already waiting.
+    """
+    global _inflight_singles
+    record_id, final_payload, rejected = _prepare_record(record_entry)
+    if rejected is not None:
+        return rejected.to_dict()
 
     with _jobs_lock:
-        _jobs[job_id] = job_data
-    logger.info(
-        "enqueue_batch_job %s: %d record(s), timeout=%s",
-        job_id,
-        len(records),
-        timeout,
-    )
+        admitted = not _MAX_INFLIGHT_SINGLES or _inflight_singles < _MAX_INFLIGHT_SINGLES
+        if admitted:
+            _inflight_singles += 1
+    if not admitted:
+        retry_after = _retry_after(1)
+        logger.warning("Rejecting single sync for %s: %d in flight, retry after %ds", record_id, _MAX_INFLIGHT_SINGLES, retry_after)
+        raise TaskSyncOverloaded(f"too many single syncs in flight (limit {_MAX_INFLIGHT_SINGLES})", retry_after)
+
+    try:
+        future = _scheduler.submit(
+            priority,
+            ("single", webhook_url),
+            _start_record,
+            webhook_url,
+            record_id,
+            final_payload,
+            timeout=timeout,
+        )
+        return future.result().to_dict()
+    finally:
+        with _jobs_lock:
+            _inflight_singles -= 1
+
+
+class BatchJobFeed:
+    """Producer side of a streaming batch job.
+
+    :meth:`put` validates each record as it is read (rejects are recorded on
+    the job at once) and buffers the clean ones for the job worker. Buffering
+    never waits for dispatch: the first ``memory_limit`` waiting records are
+    kept in memory and the rest are spooled to a temporary file, so an upload
+    is answered as soon as it has been read, however slowly the records are
+    sent upstream. Call :meth:`close` when done.
+
+    Queued records count towards TASK_SYNC_MAX_QUEUED_RECORDS: past it,
+    :meth:`put` raises TaskSyncOverloaded and ``count`` is the number of
+    records the job took.
+    """
+
+    def __init__(self, job: BatchJob, memory_limit: int) -> None:
+        self.job_id = job.job_id
+        self.count = 0
+        self._job = job
+        self._memory_limit = max(1, memory_limit)
+        self._memory: Deque[Tuple[int, str, Dict[str, Any]]] = deque()
+        self._spool: IO[bytes] | None = None
+        self._spool_offset = 0  # read position in the spool file
+        self._spooled = 0  # records written to the spool and not read yet
+        self._closed = False
+        self._aborted = False
+        self._cond = threading.Condition()
+
+    def put(self, entry: Any) -> bool:
+        """Validate and buffer one record; returns False if the job worker has stopped.
+
+        Raises TaskSyncOverloaded (without taking the record) when the queued-record limit is reached.
+        """
+        if self._aborted:
+            return False
+        index = self.count
+        record_id, final_payload, rejected = _prepare_record(entry)
+        if rejected is not None:
+            self.count += 1
+            _record_result(self._job, index, rejected)
+            return True
+        with self._cond:
+            if self._aborted:
+                return False
+            _admit_queued_record()
+            self.count += 1
+            # once records spill to disk, later ones follow them there to keep the order
+            if self._spooled or len(self._memory) >= self._memory_limit:
+                if self._spool is None:
+                    self._spool = tempfile.TemporaryFile()
+                self._spool.seek(0, os.SEEK_END)
+                self._spool.write(json.dumps([index, record_id, final_payload], ensure_ascii=False).encode("utf-8") + b"\n")
+                self._spooled += 1
+            else:
+                self._memory.append((index, record_id, final_payload))
+            self._cond.notify()
+        return True
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def abort(self) -> None:
+        """Stop the feed and drop the records still buffered (the job worker has stopped)."""
+        with self._cond:
+            self._aborted = True
+            _track_pending(-(len(self._memory) + self._spooled))
+            self._memory.clear()
+            self._spooled = 0
+            self._close_spool()
+            self._cond.notify_all()
+
+    def _read_spooled(self) -> Tuple[int, str, Dict[str, Any]]:
+        self._spool.seek(self._spool_offset)
+        line = self._spool.readline()
+        self._spooled -= 1
+        if self._spooled:
+            self._spool_offset = self._spool.tell()
+        else:
+            # drained: reuse the file from the start
+            self._spool.seek(0)
+            self._spool.truncate()
+            self._spool_offset = 0
+        index, record_id, final_payload = json.loads(line)
+        return index, record_id, final_payload
+
+    def _close_spool(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def __iter__(self) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        while True:
+            with self._cond:
+                while not (self._memory or self._spooled or self._closed or self._aborted):
+                    self._cond.wait()
+                if self._memory:
+                    item = self._memory.popleft()
+                elif self._spooled:
+                    item = self._read_spooled()
+                else:
+                    self._close_spool()
+                    return
+            yield item
+
+
+# Records of an NDJSON upload kept in memory while they wait for dispatch;
+# the rest are spooled to a temporary file.
+_FEED_QUEUE_SIZE = int(os.getenv("TASK_SYNC_FEED_QUEUE_SIZE", "256"))
+
+
+def _new_job(priority: str) -> BatchJob:
+    job = BatchJob(uuid.uuid4().hex, priority)
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+    return job
+
+
+def _record_result(job: BatchJob, index: int, result: RecordResult) -> None:
+    result.index = index
+    with _jobs_changed:
+        job.add_result(result)
+        _jobs_changed.notify_all()
+
+
+def _prepare_stream(job: BatchJob, records: Iterable[Any]) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    """Validate records lazily as they arrive, recording rejects and yielding clean ones."""
+    for index, entry in enumerate(records):
+        record_id, final_payload, rejected = _prepare_record(entry)
+        if rejected is not None:
+            _record_result(job, index, rejected)
+            continue
+        _track_pending(1)
+        yield index, record_id, final_payload
+
+
+def _start_batch_worker(
+    job: BatchJob,
+    webhook_url: str,
+    prepared: Iterable[Tuple[int, str, Dict[str, Any]]],
+    *,
+    timeout: int,
+    feed: BatchJobFeed | None = None,
+) -> None:
+    """Dispatch already-validated (index, record_id, payload) tuples on the shared scheduler.
+
+    The job is its own lane in its priority class, so concurrent jobs are
+    served round-robin rather than first come, first served.
+    """
+    job_id = job.job_id
 
     def worker():
         logger.info(
-            "job %s worker started on thread %s (records=%d)",
+            "job %s dispatcher started on thread %s (priority=%s concurrency=%d)",
             job_id,
             threading.current_thread().name,
-            len(records),
+            job.priority,
+            _JOB_CONCURRENCY,
         )
-        results: List[Dict[str, Any]] = []
-        success_count = 0
-        accepted_count = 0
-        error_count = 0
-        for entry in records:
-            result = process_single_record(
+        slots = threading.Semaphore(_JOB_CONCURRENCY)
+
+        def on_done(index: int, future: Future) -> None:
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("job %s record #%d crashed", job_id, index)
+                result = RecordResult(None, _ERROR, message=str(exc))
+            _record_result(job, index, result)
+            _track_pending(-1)
+            slots.release()
+
+        for index, record_id, final_payload in prepared:
+            slots.acquire()
+            future = _scheduler.submit(
+                job.priority,
+                ("job", job_id),
+                _start_record,
                 webhook_url,
-                entry,
+                record_id,
+                final_payload,
                 timeout=timeout,
             )
-            status = result.get("status")
-            if status == "success":
-                success_count += 1
-            elif status == "accepted":
-                accepted_count += 1
-            else:
-                error_count += 1
-            results.append(result)
-
-            with _jobs_lock:
-                job_data["results"] = list(results)
-                job_data["status"] = "running"
-                job_data["updatedAt"] = time.time()
-
-        total = len(results)
-        if error_count == 0 and accepted_count == 0:
-            overall = "success"
-        elif success_count == 0 and accepted_count == 0:
-            overall = "error"
-        elif success_count == total:
-            overall = "success"
-        elif success_count == 0 and error_count == 0:
-            overall = "accepted"
-        else:
-            overall = "partial"
+            future.add_done_callback(partial(on_done, index))
 
-        with _jobs_lock:
-            job_data.update(
-                {
-                    "status": overall,
-                    "results": list(results),
-                    "completedAt": time.time(),
-                }
-            )
+        # every submitted record releases its slot once done
+        for _ in range(_JOB_CONCURRENCY):
+            slots.acquire()
+
+        with _jobs_changed:
+            overall = job.finish()
+            _jobs_changed.notify_all()
         logger.info(
-            "job %s worker finished: total=%d success=%d accepted=%d error=%d status=%s",
+            "job %s finished: total=%d success=%d accepted=%d error=%d status=%s",
             job_id,
-            total,
-            success_count,
-            accepted_count,
-            error_count,
+            len(job.results),
+            job.counts[_SUCCESS],
+            job.counts[_ACCEPTED],
+            job.counts[_ERROR],
             overall,
         )
 
@@ -284,26 +892,157 @@ def enqueue_batch_job(
             worker()
         except Exception:  # noqa: BLE001
             logger.exception("job %s worker crashed", job_id)
-            with _jobs_lock:
-                job_data.update(
-                    {
-                        "status": "error",
-                        "results": [],
-                        "completedAt": time.time(),
-                    }
-                )
+            if feed is not None:
+                feed.abort()
+            with _jobs_changed:
+                job.results = []
+                job.counts = [0, 0, 0]
+                job.status = "error"
+                job.version += 1
+                job.completed_at = time.time()
+                _jobs_changed.notify_all()
+        finally:
+            _release_job()
 
     thread = threading.Thread(target=worker_wrapper, daemon=True)
     thread.start()
 
-    return job_id
+
+def enqueue_batch_job(
+    webhook_url: str,
+    records: List[Any],
+    *,
+    timeout: int = 70,
+    priority: str | None = None,
+) -> str:
+    """Validate the whole batch up front, then dispatch only the clean records.
+
+    Invalid records are recorded as ``error`` results (with field-level
+    ``errors``) before this returns, without any upstream call. Without an
+    explicit ``priority``, batches of up to TASK_SYNC_INTERACTIVE_MAX_RECORDS
+    records run as interactive and larger ones as bulk.
+
+    Raises TaskSyncOverloaded when the active-job or queued-record limit is reached.
+    """
+    if priority is None:
+        priority = INTERACTIVE if len(records) <= _INTERACTIVE_MAX_RECORDS else BULK
+    _admit_job(len(records))
+    job = _new_job(priority)
+    prepared: List[Tuple[int, str, Dict[str, Any]]] = []
+    try:
+        prepared.extend(_prepare_stream(job, records))
+    except Exception:
+        # undo everything the partial validation reserved: pending count, job entry, job slot
+        _track_pending(-len(prepared))
+        discard_job(job.job_id)
+        _release_job()
+        raise
+    logger.info(
+        "enqueue_batch_job %s: %d record(s), %d rejected by validation, priority=%s timeout=%s",
+        job.job_id,
+        len(records),
+        len(records) - len(prepared),
+        priority,
+        timeout,
+    )
+    _start_batch_worker(job, webhook_url, prepared, timeout=timeout)
+    return job.job_id
+
+
+def open_batch_job_feed(
+    webhook_url: str,
+    *,
+    timeout: int = 70,
+    priority: str = BULK,
+) -> BatchJobFeed:
+    """Start a batch job whose records are supplied incrementally through the returned feed.
+
+    Raises TaskSyncOverloaded when the active-job or queued-record limit is reached.
+    """
+    _admit_job(None)
+    job = _new_job(priority)
+    feed = BatchJobFeed(job, _FEED_QUEUE_SIZE)
+    logger.info(
+        "open_batch_job_feed %s: streaming records, priority=%s timeout=%s",
+        job.job_id,
+        priority,
+        timeout,
+    )
+    _start_batch_worker(job, webhook_url, feed, timeout=timeout, feed=feed)
+    return feed
 
 
-def get_job_status(job_id: str, *, pop: bool = False) -> Dict[str, Any] | None:
+def get_job_status(
+    job_id: str,
+    *,
+    pop: bool = False,
+    summary_only: bool = False,
+) -> Dict[str, Any] | None:
+    """Return the job as an API dict (``status``, counters, timestamps, ``results``).
+
+    With ``summary_only`` the results are left out, which is O(1).
+    """
     with _jobs_lock:
         job = _jobs.get(job_id)
         if not job:
             return None
         if pop:
             _jobs.pop(job_id, None)
-        return dict(job)  # shallow copy
+        data = job.summary() if summary_only else job.to_dict()
+        data["version"] = job.version
+        return data
+
+
+def get_job_state(job_id: str) -> Tuple[int, str] | None:
+    """Return (version, status) without serializing anything; None if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return None
+        return job.version, job.status
+
+
+def discard_job(job_id: str) -> None:
+    with _jobs_lock:
+        _jobs.pop(job_id, None)
+
+
+def iter_job_results(job_id: str, *, pop: bool = True) -> Iterator[Dict[str, Any]]:
+    """Yield each result of a job as soon as it is recorded, then a final summary.
+
+    Blocks only the calling thread (one per streaming client); records keep
+    running on the shared scheduler. The summary is
+    ``{"type": "summary", "jobId", "status", "total", "success", "accepted", "error"}``.
+    The finished job is removed from the cache when ``pop`` is true.
+    """
+    cursor = 0
+    summary: Dict[str, Any] = {"status": "error", "total": 0, "success": 0, "accepted": 0, "error": 0}
+    while True:
+        with _jobs_changed:
+            job = _jobs.get(job_id)
+            if job is None:
+                break
+            while cursor >= len(job.results) and job.status not in _FINAL_STATUSES:
+                _jobs_changed.wait(timeout=5.0)
+            fresh = job.results[cursor:]
+            cursor += len(fresh)
+            done = job.status in _FINAL_STATUSES
+            if done:
+                summary = job.summary()
+        for result in fresh:
+            yield result.to_dict()
+        if done:
+            break
+
+    if pop:
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+    yield {
+        "type": "summary",
+        "jobId": job_id,
+        "status": summary["status"],
+        "total": summary["total"],
+        "success": summary["success"],
+        "accepted": summary["accepted"],
+        "error": summary["error"],
+    }
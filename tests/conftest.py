@@ -0,0 +1,67 @@
+"""Shared fixtures: the stub upstream (stub_upstream.py) and the app served by waitress.
+
+The app modules read their settings at import time, so the environment is set
+here before anything imports them, and the app is imported lazily by the
+``server`` fixture.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from typing import Iterator
+
+import pytest
+
+from stub_upstream import StubServer
+
+
+# waitress threads for the app under test; the task-sync admission limits derive from it
+SERVE_THREADS = 8
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+STUB_PORT = _free_port()
+os.environ.setdefault("APP_ID", "cli_test")
+os.environ.setdefault("APP_SECRET", "test-secret")
+os.environ["FEISHU_API_BASE"] = f"http://127.0.0.1:{STUB_PORT}/open-apis"
+os.environ["SERVE_THREADS"] = str(SERVE_THREADS)
+
+
+class _Stub(StubServer):
+    request_queue_size = 128  # bursts of test clients must not be refused at accept()
+
+
+@pytest.fixture(scope="session")
+def stub() -> Iterator[StubServer]:
+    server = _Stub(("127.0.0.1", STUB_PORT), feishu_latency_ms=0, anycross_latency_ms=0, jitter=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def webhook_url(stub: StubServer) -> str:
+    return f"http://127.0.0.1:{STUB_PORT}/anycross/trigger/callback/test"
+
+
+@pytest.fixture(scope="session")
+def server(stub: StubServer) -> Iterator[str]:
+    """Base URL of the app running under waitress with SERVE_THREADS threads."""
+    from waitress.server import create_server
+
+    from app import app
+
+    httpd = create_server(app, host="127.0.0.1", port=0, threads=SERVE_THREADS, clear_untrusted_proxy_headers=True)
+    thread = threading.Thread(target=httpd.run, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.effective_port}"
+    httpd.close()
@@ -0,0 +1,111 @@
+"""bulk_send.py run as a CLI against the stub upstream."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from conftest import STUB_PORT
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_cli(*args: str, stdin: str | None = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Run the CLI; return (per-line results from stdout, the stats line from stderr)."""
+    env = dict(os.environ, FEISHU_API_BASE=f"http://127.0.0.1:{STUB_PORT}/open-apis")
+    proc = subprocess.run(
+        [sys.executable, "bulk_send.py", *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        cwd=ROOT,
+        env=env,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    results = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+    stats = json.loads(proc.stderr.strip().splitlines()[-1])
+    return sorted(results, key=lambda r: r["line"]), stats
+
+
+def summary(task: str) -> str:
+    return f"今日任务:\n@ou_a, 项目, {task}, 进行中\n"
+
+
+def test_summaries(stub, tmp_path):
+    lines = [
+        json.dumps({"id": "a", "summaryText": summary("任务一")}, ensure_ascii=False),
+        json.dumps({"id": "a-again", "summaryText": summary("任务一")}, ensure_ascii=False),  # same chat, same content
+        json.dumps({"id": "b", "summaryText": summary("任务二"), "chatIds": ["oc_other"], "openIds": ["ou_1", "ou_2"]}, ensure_ascii=False),
+        json.dumps(summary("任务一").replace("进行中", "已完成"), ensure_ascii=False),  # bare string, status changed
+        "",
+        "not json",
+        json.dumps({"id": "empty", "summaryText": " "}),
+    ]
+    source = tmp_path / "summaries.jsonl"
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    out = tmp_path / "results.jsonl"
+
+    _, stats = run_cli("summaries", str(source), "--chat-id", "oc_default", "--title", "测试汇总", "--concurrency", "1", "--out", str(out))
+    results = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    by_line = {r["line"]: r for r in results}
+
+    assert stats["type"] == "stats" and stats["total"] == 6
+    assert stats["success"] == 4 and stats["error"] == 2
+    assert sorted(by_line) == [1, 2, 3, 4, 6, 7]  # blank line skipped
+
+    first, again, other, bare = by_line[1], by_line[2], by_line[3], by_line[4]
+    assert first["id"] == "a" and first["status"] == "success"
+    assert first["results"][0]["receiveId"] == "oc_default" and first["results"][0]["action"] == "new"
+    assert again["results"][0]["action"] == "noop"  # edit in place: nothing changed, nothing sent
+    assert {r["receiveId"] for r in other["results"]} == {"oc_other", "ou_1", "ou_2"}
+    assert all(r["status"] == "success" for r in other["results"])
+    assert bare["status"] == "success" and bare["results"][0]["action"] == "edit"  # same chat/title/day, status changed
+    assert bare["results"][0]["diff"] == {"added": 0, "removed": 0, "changed": 1, "unchanged": 0}
+    assert by_line[6]["status"] == "error" and "invalid JSON" in by_line[6]["message"]
+    assert by_line[7] == {**by_line[7], "id": "empty", "status": "error", "message": "Missing summaryText"}
+    assert all("latencyMs" in r for r in results)
+
+
+def test_summaries_no_edit_and_missing_target(stub):
+    stdin = json.dumps(summary("任务一"), ensure_ascii=False) + "\n" + json.dumps(summary("任务一"), ensure_ascii=False) + "\n"
+    results, stats = run_cli("summaries", "-", "--chat-id", "oc_x", "--no-edit", "--concurrency", "1", stdin=stdin)
+    assert [r["results"][0]["action"] for r in results] == ["new", "new"]
+
+    results, stats = run_cli("summaries", "-", stdin=json.dumps({"summaryText": summary("x")}, ensure_ascii=False) + "\n")
+    assert stats["error"] == 1 and "chatIds or openIds is required" in results[0]["message"]
+
+
+def test_task_sync(stub, webhook_url):
+    other_url = webhook_url.replace("/test", "/other")
+    stdin = "\n".join([
+        json.dumps("rec1"),
+        json.dumps({"recordId": "rec2", "payload": {"任务名称": "同步"}}, ensure_ascii=False),
+        json.dumps({"recordId": "rec3", "webhookUrl": other_url}),
+        json.dumps({"recordId": "rec4", "payload": {"执行者": [{"id": "ou_x", "type": []}]}}, ensure_ascii=False),
+    ]) + "\n"
+    results, stats = run_cli("task-sync", "-", "--webhook-url", webhook_url, "--concurrency", "4", stdin=stdin)
+
+    assert stats["total"] == 4 and stats["success"] == 3 and stats["error"] == 1
+    assert [r["recordId"] for r in results] == ["rec1", "rec2", "rec3", "rec4"]
+    assert all(r["http"] == 200 for r in results[:3])
+    assert results[3]["status"] == "error" and "执行者" in results[3]["errors"]
+
+
+def test_task_sync_requires_a_webhook(stub):
+    results, stats = run_cli("task-sync", "-", stdin='"rec1"\n')
+    assert stats["error"] == 1 and "webhookUrl is required" in results[0]["message"]
+
+
+def test_rate_limit(stub, webhook_url):
+    stdin = "".join(json.dumps(f"rec{i}") + "\n" for i in range(6))
+    results, stats = run_cli("task-sync", "-", "--webhook-url", webhook_url, "--concurrency", "6", "--rate", "10", stdin=stdin)
+    assert stats["success"] == 6
+    # six starts spaced 0.1 s apart
+    assert stats["elapsedSec"] >= 0.5
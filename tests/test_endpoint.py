@@ -0,0 +1,52 @@
+"""POST /api/endpoint sends against the stub upstream."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+import requests
+
+
+FEISHU_MS = 500
+
+
+@pytest.fixture
+def targets(monkeypatch):
+    monkeypatch.setenv("PD_CHAT_ID", "oc_pd")
+    monkeypatch.setenv("OPS_CHAT_ID", "oc_ops")
+
+
+@pytest.fixture
+def slow_feishu(stub):
+    stub.feishu_latency_ms = FEISHU_MS
+    yield stub
+    stub.feishu_latency_ms = 0
+
+
+def test_targets_are_sent_in_parallel_without_edit(server, targets, slow_feishu, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "POST_EDIT_ENABLED", False)
+    requests.get(f"{server}/healthz", timeout=10)  # tenant token fetched outside the timing
+    summary = "今日任务:\n@ou_a, 项目, 并发发送, 进行中"
+    started = time.monotonic()
+    resp = requests.post(f"{server}/api/endpoint", json={"summaryText": summary, "pd": True, "ops": True}, timeout=10)
+    elapsed = time.monotonic() - started
+
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["targets"] == ["oc_pd", "oc_ops"]
+    # one Feishu round trip, not one per target
+    assert elapsed < FEISHU_MS / 1000 * 1.8
+
+
+def test_unchanged_resend_reports_nothing_sent(server, targets):
+    summary = "今日任务:\n@ou_b, 项目, 重复发送, 进行中"
+    body = {"summaryText": summary, "pd": True, "ops": True}
+    first = requests.post(f"{server}/api/endpoint", json=body, timeout=10).json()
+    again = requests.post(f"{server}/api/endpoint", json=body, timeout=10).json()
+
+    assert first["message"] == "Sent to targets" and first["partsSent"] == 2
+    assert [r["action"] for r in again["results"]] == ["noop", "noop"]
+    assert again["message"] == "Not sent: unchanged since the last send"
+    assert again["parts"] == 1 and again["partsSent"] == 0
@@ -0,0 +1,142 @@
+"""The server keeps answering health checks, polls and 429s while task-sync is overloaded."""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from conftest import SERVE_THREADS
+
+
+# Anycross calls slow enough that admitted requests hold their threads during the checks
+SLOW_MS = 2000
+
+
+@pytest.fixture
+def slow_upstream(stub):
+    stub.anycross_latency_ms = SLOW_MS
+    yield stub
+    stub.anycross_latency_ms = 0
+
+
+def _wait_idle(server: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        admission = requests.get(f"{server}/api/task-sync/metrics", timeout=5).json()["admission"]
+        if not admission["inflightSingles"] and not admission["openStreams"] and not admission["activeJobs"]:
+            return admission
+        assert time.monotonic() < deadline, admission
+        time.sleep(0.1)
+
+
+def _timed_get(url: str) -> tuple[int, float]:
+    started = time.monotonic()
+    resp = requests.get(url, timeout=5)
+    return resp.status_code, time.monotonic() - started
+
+
+def test_limits_leave_threads_free():
+    import task_sync_service
+
+    assert task_sync_service._MAX_INFLIGHT_SINGLES == SERVE_THREADS // 4
+    assert task_sync_service._MAX_STREAMS == SERVE_THREADS // 4
+    assert task_sync_service._MAX_INFLIGHT_SINGLES + task_sync_service._MAX_STREAMS < SERVE_THREADS
+
+
+def test_single_syncs_past_the_limit_get_429_and_health_stays_up(server, webhook_url, slow_upstream):
+    clients = 3 * SERVE_THREADS
+
+    def single(i: int) -> tuple[int, float, str | None]:
+        started = time.monotonic()
+        resp = requests.post(f"{server}/api/task-sync", json={"webhookUrl": webhook_url, "recordId": f"rec{i}"}, timeout=30)
+        return resp.status_code, time.monotonic() - started, resp.headers.get("Retry-After")
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        calls = [pool.submit(single, i) for i in range(clients)]
+        time.sleep(0.5)  # admitted calls are now waiting on the slow upstream
+        probes = [_timed_get(f"{server}/healthz") for _ in range(5)]
+        probes.append(_timed_get(f"{server}/api/task-sync/metrics"))
+        results = [call.result() for call in calls]
+
+    assert all(status == 200 and elapsed < 1.0 for status, elapsed in probes), probes
+    accepted = [r for r in results if r[0] == 200]
+    rejected = [r for r in results if r[0] == 429]
+    assert len(accepted) + len(rejected) == clients
+    assert 1 <= len(accepted) <= SERVE_THREADS // 4 * 2  # limit, plus calls admitted after the first finished
+    assert all(elapsed < 1.0 and retry_after for _, elapsed, retry_after in rejected), rejected
+    _wait_idle(server)
+
+
+def test_streams_past_the_limit_get_429_and_polls_stay_up(server, webhook_url, slow_upstream):
+    limit = SERVE_THREADS // 4
+
+    def streamed(i: int) -> tuple[int, list]:
+        resp = requests.post(
+            f"{server}/api/task-sync",
+            json={"webhookUrl": webhook_url, "records": [f"rec{i}"], "stream": True},
+            timeout=30,
+        )
+        return resp.status_code, resp.text.splitlines()
+
+    with ThreadPoolExecutor(max_workers=limit) as pool:
+        streams = [pool.submit(streamed, i) for i in range(limit)]
+        time.sleep(0.5)
+        # every stream slot is taken: NDJSON uploads and more streams are refused at once
+        started = time.monotonic()
+        extra = requests.post(
+            f"{server}/api/task-sync",
+            json={"webhookUrl": webhook_url, "records": ["recX"], "stream": True},
+            timeout=5,
+        )
+        upload = requests.post(
+            f"{server}/api/task-sync",
+            params={"webhookUrl": webhook_url},
+            data='"recY"\n',
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=5,
+        )
+        refused_in = time.monotonic() - started
+        # a plain batch is still accepted and can be polled while the streams wait
+        job = requests.post(f"{server}/api/task-sync", json={"webhookUrl": webhook_url, "records": ["recZ"]}, timeout=5)
+        poll = _timed_get(f"{server}/api/task-sync/status/{job.json()['jobId']}")
+        health = _timed_get(f"{server}/healthz")
+        finished = [s.result() for s in streams]
+
+    assert extra.status_code == 429 and extra.headers["Retry-After"]
+    assert upload.status_code == 429
+    assert refused_in < 1.0
+    assert job.status_code == 202
+    assert poll[0] == 200 and poll[1] < 1.0
+    assert health[0] == 200 and health[1] < 1.0
+    assert all(status == 200 and len(lines) == 2 for status, lines in finished), finished
+    # closing the streamed responses gave the slots back
+    assert _wait_idle(server)["openStreams"] == 0
+
+
+def test_ndjson_upload_stops_at_the_queued_record_limit(server, webhook_url, slow_upstream, monkeypatch):
+    import task_sync_service
+
+    limit = 5
+    monkeypatch.setattr(task_sync_service, "_MAX_QUEUED_RECORDS", limit)
+    body = "".join(f'"rec{i}"\n' for i in range(20))
+    upload = requests.post(
+        f"{server}/api/task-sync",
+        params={"webhookUrl": webhook_url},
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=5,
+    )
+    # the upload's records fill the queue: other batches are refused too
+    other = requests.post(f"{server}/api/task-sync", json={"webhookUrl": webhook_url, "records": ["recZ"]}, timeout=5)
+
+    assert upload.status_code == 429 and upload.headers["Retry-After"]
+    data = upload.json()
+    assert data["records"] == limit and data["jobId"]
+    assert other.status_code == 429
+    # the records taken before the limit still run
+    _wait_idle(server, timeout=20)
+    job = requests.get(f"{server}/api/task-sync/status/{data['jobId']}", timeout=5).json()
+    assert job["total"] == limit and job["success"] == limit
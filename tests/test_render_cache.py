@@ -0,0 +1,35 @@
+"""render_cache.py: a dry-run preview warms the send render of the same summary."""
+
+from __future__ import annotations
+
+import json
+
+import feishu
+from render_cache import MENTIONS, SECTIONS, render_cache_stats, render_summary
+
+
+def test_preview_warms_send():
+    summary = "今日任务:\n@ou_a, 项目, 预热, 进行中\n@ou_b @ou_c, 项目, 发送, 已完成"
+    before = render_cache_stats()["bodies"]
+
+    preview = render_summary(summary, title="调试", mode=MENTIONS)
+    sent = render_summary(summary, title="任务汇总", mode=SECTIONS)
+
+    after = render_cache_stats()["bodies"]
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # same lines, each post keeps its own title and items
+    assert sent.content == feishu.render_post_content_from_summary_text(summary, title="任务汇总")
+    assert sent.zh_cn["title"] == "任务汇总" and preview.zh_cn["title"] == "调试"
+    assert json.loads(sent.content)["zh_cn"]["content"] == json.loads(preview.content)["zh_cn"]["content"]
+    assert "raw" in preview.today_items[0] and "raw" not in sent.today_items[0]
+
+
+def test_title_split_matches_uncached():
+    summary = "今日任务:\n" + "\n".join(f"@ou_{i}, 项目, 任务{i} {'x' * 200}, 进行中" for i in range(300))
+    for title in ("任务汇总", "很长的标题" * 20):
+        post = render_summary(summary, title=title, mode=SECTIONS)
+        date_label, today, week = feishu._parse_summary_sections(summary)
+        assert len(post.parts) > 1
+        assert post.parts == feishu.render_post_parts(title=title, date_label=date_label, today_items=today, week_items=week)
@@ -0,0 +1,31 @@
+"""Batch jobs over HTTP against the stub upstream."""
+
+from __future__ import annotations
+
+import time
+
+import requests
+
+
+def _wait_done(server: str, job_id: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        summary = requests.get(f"{server}/api/task-sync/status/{job_id}", params={"view": "summary"}, timeout=5).json()
+        if summary["status"] not in ("pending", "running"):
+            return summary
+        assert time.monotonic() < deadline, summary
+        time.sleep(0.05)
+
+
+def test_polled_results_are_in_input_order(server, webhook_url):
+    invalid = {"recordId": "bad", "payload": {"执行者": [{"id": "ou_x", "type": []}]}}
+    # rejects are recorded before the valid records finish
+    records = [f"rec{i}" for i in range(10)] + [invalid, invalid, "rec12"]
+    resp = requests.post(f"{server}/api/task-sync", json={"webhookUrl": webhook_url, "records": records}, timeout=5)
+    assert resp.status_code == 202
+    job_id = resp.json()["jobId"]
+    _wait_done(server, job_id)
+
+    results = requests.get(f"{server}/api/task-sync/status/{job_id}", timeout=5).json()["results"]
+    assert [r["index"] for r in results] == list(range(len(records)))
+    assert [r["status"] for r in results[10:12]] == ["error", "error"]